@@ -0,0 +1,420 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Alocação global dos órgãos disponíveis (ORGAO com RECEPCAO nula) aos receptores em espera (RECEPTOR_ESPERA)
+#Em vez de escolher o melhor receptor órgão a órgão (guloso), resolve um emparelhamento bipartido de custo mínimo:
+#primeiro o maior número possível de órgãos alocados, depois a menor soma de custos
+#Custo de um par = prioridade do receptor + incompatibilidade HLA + logística (estado do hospital da coleta x estado do receptor)
+#Órgãos de tipos diferentes não disputam receptores, então cada tipo é resolvido separadamente
+
+from tabulate import tabulate
+from collections import namedtuple, defaultdict
+import heapq
+import random
+import re
+import time
+
+import BaseLocal
+import FilaEspera
+
+#Pesos do custo: cada nível de prioridade (1 é a máxima) vale mais que HLA e logística juntos no mesmo par
+PESO_PRIORIDADE = 10
+#Por nível de diferença HLA: 0 = mesmo alelo, 1 = mesmo grupo de alelos, 2 = grupo ou locus diferente (ou sem exame)
+PESO_HLA = 3
+#Órgão coletado em outro estado (ou estado desconhecido)
+PESO_LOGISTICA = 3
+
+Orgao = namedtuple("Orgao", ["TIPO", "COLETA", "LADO", "TIPO_SANGUINEO", "RH", "HLA", "ESTADO", "DOADOR"])
+Receptor = namedtuple("Receptor", ["RECEPTOR", "TIPO_ORGAO", "PRIORIDADE", "SANGUE", "HLA", "ESTADO"])
+
+#======================================= CUSTO ======================================
+
+#'HLA-A*02:01' -> ('A', ('02', '01')); None se não houver HLA
+def LeHLA(texto):
+    if texto is None:
+        return None
+
+    hla = re.search(r"HLA-([A-Z0-9]+)\*(\d+(?::\d+)*)", texto)
+    return None if hla is None else (hla.group(1), tuple(hla.group(2).split(":")))
+
+#Nível de diferença entre dois HLA já lidos (LeHLA)
+def DistanciaHLA(a, b):
+    if a is None or b is None or a[0] != b[0]:
+        return 2
+    if a[1][:2] == b[1][:2]:
+        return 0
+
+    return 1 if a[1][0] == b[1][0] else 2
+
+#Custo de alocar o órgão ao receptor (os dois já compatíveis); HLA já lidos por LeHLA
+def Custo(orgao, hlaOrgao, receptor, hlaReceptor):
+    return CustoBase(receptor) + CustoPar(orgao, hlaOrgao, receptor, hlaReceptor)
+
+#Parte do custo que só depende do receptor
+def CustoBase(receptor):
+    return PESO_PRIORIDADE * (receptor.PRIORIDADE - 1)
+
+#Parte do custo que depende do par, limitada a 2 * PESO_HLA + PESO_LOGISTICA
+def CustoPar(orgao, hlaOrgao, receptor, hlaReceptor):
+    logistica = orgao.ESTADO is None or orgao.ESTADO != receptor.ESTADO
+    return PESO_HLA * DistanciaHLA(hlaOrgao, hlaReceptor) + PESO_LOGISTICA * logistica
+
+#======================================= GRAFO ======================================
+
+#Arestas viáveis (ABO/Rh, mesmo tipo de órgão, receptor diferente do doador) de cada órgão de um mesmo tipo
+#Retorna, por órgão, a lista de (índice do receptor, custo)
+#Cada órgão só precisa dos seus m receptores mais baratos (m = número de órgãos): se um ótimo usasse outro,
+#um desses m estaria livre e a troca não aumentaria o custo. Os receptores são percorridos por nível de
+#prioridade e a busca para quando a parte fixa do custo já passa do m-ésimo melhor
+def MontaArestas(orgaos, receptores):
+    m = len(orgaos)
+    hlaReceptores = [LeHLA(receptor.HLA) for receptor in receptores]
+
+    #Receptores de cada grupo sanguíneo, separados pela parte fixa do custo (nível de prioridade)
+    grupos = defaultdict(lambda: defaultdict(list))
+    for indice, receptor in enumerate(receptores):
+        if receptor.SANGUE is not None:
+            grupos[receptor.SANGUE][CustoBase(receptor)].append(indice)
+    niveis = sorted({nivel for porNivel in grupos.values() for nivel in porNivel})
+
+    arestas = []
+    for orgao in orgaos:
+        hlaOrgao = LeHLA(orgao.HLA)
+        compativeis = [porNivel for sangue, porNivel in grupos.items() if FilaEspera.Compativel(sangue, orgao.TIPO_SANGUINEO, orgao.RH)]
+
+        #Max-heap (custos negativos) com os m mais baratos até agora
+        melhores = []
+        for nivel in niveis:
+            if len(melhores) == m and nivel >= -melhores[0][0]:
+                break
+
+            for porNivel in compativeis:
+                for indice in porNivel.get(nivel, ()):
+                    receptor = receptores[indice]
+                    if receptor.RECEPTOR == orgao.DOADOR:
+                        continue
+
+                    custo = nivel + CustoPar(orgao, hlaOrgao, receptor, hlaReceptores[indice])
+                    if len(melhores) < m:
+                        heapq.heappush(melhores, (-custo, indice))
+                    elif custo < -melhores[0][0]:
+                        heapq.heapreplace(melhores, (-custo, indice))
+
+        arestas.append([(indice, -custo) for custo, indice in melhores])
+
+    return arestas
+
+#======================================= EMPARELHAMENTO ======================================
+
+#Linha deixada sem coluna (órgão não alocado)
+DESCARTE = -2
+
+#Emparelhamento de custo mínimo entre linhas (órgãos) e colunas (receptores), por caminhos aumentantes mínimos
+#(Dijkstra com potenciais, como no algoritmo húngaro/Jonker-Volgenant), uma linha por vez
+#Cada linha também pode ficar sem coluna pagando custoDescarte; com ele maior que qualquer troca possível,
+#o resultado aloca o máximo de linhas e, entre essas alocações, tem o menor custo
+#arestas -> por linha, lista de (coluna, custo) com custos inteiros não negativos
+#Retorna a coluna de cada linha (ou DESCARTE)
+def Emparelha(arestas, nColunas, custoDescarte):
+    nLinhas = len(arestas)
+    #Potenciais: custo reduzido = custo - u[linha] - v[coluna], nunca negativo e zero nos pares emparelhados
+    u = [0] * nLinhas
+    v = [0] * nColunas
+    linhaDaColuna = [-1] * nColunas
+    colunaDaLinha = [-1] * nLinhas
+
+    #Estado do Dijkstra por coluna; 'visita' marca em qual busca o valor foi escrito, evitando limpar as listas
+    distancia = [0] * nColunas
+    anterior = [0] * nColunas
+    visita = [-1] * nColunas
+    finalizada = [-1] * nColunas
+
+    empilha = heapq.heappush
+    desempilha = heapq.heappop
+
+    for origem in range(nLinhas):
+        #Linhas e colunas alcançadas, com a distância até elas
+        linhas = [(origem, 0)]
+        finalizadas = []
+        #Melhor descarte entre as linhas alcançadas: (distância, linha)
+        descarte = (custoDescarte - u[origem], origem)
+        fila = []
+
+        base = -u[origem]
+        for coluna, custo in arestas[origem]:
+            d = base + custo - v[coluna]
+            if visita[coluna] != origem or d < distancia[coluna]:
+                visita[coluna] = origem
+                distancia[coluna] = d
+                anterior[coluna] = origem
+                empilha(fila, (d, coluna))
+
+        fim = None
+        while fila:
+            d, coluna = desempilha(fila)
+            if finalizada[coluna] == origem or d > distancia[coluna]:
+                continue
+            if d >= descarte[0]:
+                break
+
+            finalizada[coluna] = origem
+            finalizadas.append(coluna)
+            linha = linhaDaColuna[coluna]
+            if linha == -1:
+                fim = coluna
+                break
+
+            #Coluna ocupada: o caminho continua pela linha dona dela (aresta emparelhada tem custo reduzido zero)
+            linhas.append((linha, d))
+            if d + custoDescarte - u[linha] < descarte[0]:
+                descarte = (d + custoDescarte - u[linha], linha)
+
+            base = d - u[linha]
+            for proxima, custo in arestas[linha]:
+                nd = base + custo - v[proxima]
+                if visita[proxima] != origem or (nd < distancia[proxima] and finalizada[proxima] != origem):
+                    visita[proxima] = origem
+                    distancia[proxima] = nd
+                    anterior[proxima] = linha
+                    empilha(fila, (nd, proxima))
+
+        total = distancia[fim] if fim is not None else descarte[0]
+
+        #Atualiza os potenciais de tudo o que foi alcançado antes do fim do caminho
+        for linha, d in linhas:
+            u[linha] += total - d
+        for coluna in finalizadas:
+            v[coluna] -= total - distancia[coluna]
+
+        #Inverte o caminho: cada linha passa para a coluna pela qual foi alcançada
+        if fim is None:
+            linha = descarte[1]
+            coluna = colunaDaLinha[linha]
+            colunaDaLinha[linha] = DESCARTE
+            if linha == origem:
+                continue
+            linhaDaColuna[coluna] = -1
+        else:
+            coluna = fim
+
+        while True:
+            linha = anterior[coluna]
+            antiga = colunaDaLinha[linha]
+            colunaDaLinha[linha] = coluna
+            linhaDaColuna[coluna] = linha
+            if linha == origem:
+                break
+            coluna = antiga
+
+    return colunaDaLinha
+
+#======================================= ALOCAÇÃO ======================================
+
+#Aloca os órgãos aos receptores
+#Retorna a lista de (órgão, receptor, custo) e a lista de órgãos sem receptor compatível
+def Aloca(orgaos, receptores):
+    orgaosPorTipo = defaultdict(list)
+    receptoresPorTipo = defaultdict(list)
+    for orgao in orgaos:
+        orgaosPorTipo[orgao.TIPO].append(orgao)
+    for receptor in receptores:
+        receptoresPorTipo[receptor.TIPO_ORGAO].append(receptor)
+
+    alocacoes = []
+    naoAlocados = []
+    for tipo, orgaosTipo in orgaosPorTipo.items():
+        receptoresTipo = receptoresPorTipo[tipo]
+        arestas = MontaArestas(orgaosTipo, receptoresTipo)
+
+        #Maior custo possível de uma aresta; o descarte custa mais que qualquer troca ao longo de um caminho
+        maiorCusto = max((custo for lista in arestas for _, custo in lista), default=0)
+        colunas = Emparelha(arestas, len(receptoresTipo), (len(orgaosTipo) + 1) * (maiorCusto + 1))
+
+        for orgao, lista, coluna in zip(orgaosTipo, arestas, colunas):
+            if coluna == DESCARTE:
+                naoAlocados.append(orgao)
+            else:
+                alocacoes.append((orgao, receptoresTipo[coluna], dict(lista)[coluna]))
+
+    return alocacoes, naoAlocados
+
+#Forma gulosa (cada órgão, na ordem, fica com o receptor livre mais barato), para comparação no benchmark
+def AlocaGuloso(orgaos, receptores):
+    livres = set(range(len(receptores)))
+    hlaReceptores = [LeHLA(receptor.HLA) for receptor in receptores]
+
+    alocacoes = []
+    naoAlocados = []
+    for orgao in orgaos:
+        hlaOrgao = LeHLA(orgao.HLA)
+        candidatos = [(Custo(orgao, hlaOrgao, receptores[i], hlaReceptores[i]), i) for i in livres
+                      if receptores[i].TIPO_ORGAO == orgao.TIPO and receptores[i].RECEPTOR != orgao.DOADOR
+                      and FilaEspera.Compativel(receptores[i].SANGUE, orgao.TIPO_SANGUINEO, orgao.RH)]
+        if len(candidatos) == 0:
+            naoAlocados.append(orgao)
+            continue
+
+        custo, i = min(candidatos)
+        livres.remove(i)
+        alocacoes.append((orgao, receptores[i], custo))
+
+    return alocacoes, naoAlocados
+
+#Melhor alocação testando todas as combinações (só para instâncias pequenas)
+#Retorna (número de órgãos alocados, custo total)
+def AlocaForcaBruta(orgaos, receptores):
+    hlaReceptores = [LeHLA(receptor.HLA) for receptor in receptores]
+    opcoes = []
+    for orgao in orgaos:
+        hlaOrgao = LeHLA(orgao.HLA)
+        opcoes.append([(i, Custo(orgao, hlaOrgao, receptor, hlaReceptores[i])) for i, receptor in enumerate(receptores)
+                       if receptor.TIPO_ORGAO == orgao.TIPO and receptor.RECEPTOR != orgao.DOADOR
+                       and FilaEspera.Compativel(receptor.SANGUE, orgao.TIPO_SANGUINEO, orgao.RH)])
+
+    #Mais órgãos alocados é melhor; com o mesmo número, menor custo
+    def Melhor(posicao, usados):
+        if posicao == len(orgaos):
+            return (0, 0)
+
+        melhor = Melhor(posicao + 1, usados)
+        for i, custo in opcoes[posicao]:
+            if i not in usados:
+                alocados, total = Melhor(posicao + 1, usados | {i})
+                melhor = min(melhor, (alocados + 1, total + custo), key=lambda r: (-r[0], r[1]))
+
+        return melhor
+
+    return Melhor(0, frozenset())
+
+#======================================= BANCO ======================================
+
+#Órgãos ainda não recebidos, com o estado do hospital onde foram coletados e o doador
+SQL_ORGAOS = \
+    "SELECT O.TIPO, O.COLETA, O.LADO, O.TIPO_SANGUINEO, O.RH, O.HLA, H.ESTADO, C.PACIENTE FROM ORGAO O " \
+    "JOIN CIRURGIA C ON C.ID = O.COLETA JOIN HOSPITAL H ON H.ID = C.HOSPITAL " \
+    "WHERE O.RECEPCAO IS NULL"
+
+#Esperas de receptores vivos, com o estado de residência
+SQL_RECEPTORES = \
+    "SELECT R.RECEPTOR, R.TIPO_ORGAO, R.PRIORIDADE, P.ESTADO FROM RECEPTOR_ESPERA R " \
+    "JOIN PACIENTE PA ON PA.PESSOA = R.RECEPTOR JOIN PESSOA P ON P.ID = R.RECEPTOR WHERE PA.OBITO IS NULL"
+
+#Lê os órgãos disponíveis e os receptores em espera (3 consultas)
+#Tipo sanguíneo e HLA do receptor vêm do exame de tipagem mais recente
+def CarregaInstancia(pool):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.arraysize = 5000
+
+            cursor.execute(SQL_ORGAOS)
+            orgaos = [Orgao(*linha[:-1], BaseLocal.IdHex(linha[-1])) for linha in cursor.fetchall()]
+
+            cursor.execute(SQL_RECEPTORES)
+            esperas = cursor.fetchall()
+
+            #Ordenado por data, então o exame mais recente sobrescreve os anteriores
+            cursor.execute(FilaEspera.SQL_TIPAGENS)
+            tipagens = {BaseLocal.IdHex(paciente): resultado for paciente, resultado in cursor.fetchall()}
+
+    receptores = []
+    for receptor, tipoOrgao, prioridade, estado in esperas:
+        receptor = BaseLocal.IdHex(receptor)
+        resultado = tipagens.get(receptor)
+        receptores.append(Receptor(receptor, tipoOrgao, prioridade, FilaEspera.TipoSanguineoExame(resultado),
+                                   resultado if LeHLA(resultado) is not None else None, estado))
+
+    return orgaos, receptores
+
+def ImprimeAlocacao(alocacoes, naoAlocados):
+    print("\n==== Alocação proposta dos órgãos disponíveis ====")
+    print(tabulate([[orgao.TIPO, orgao.COLETA, orgao.LADO, f"{orgao.TIPO_SANGUINEO}{orgao.RH}", receptor.RECEPTOR,
+                     receptor.SANGUE, receptor.PRIORIDADE, orgao.ESTADO, receptor.ESTADO, custo]
+                    for orgao, receptor, custo in alocacoes],
+                   headers=["Órgão", "Coleta", "Lado", "Sangue", "Receptor", "Sangue", "Prioridade",
+                            "Estado coleta", "Estado receptor", "Custo"], tablefmt="psql"))
+    print(f"Custo total: {sum(custo for _, _, custo in alocacoes)}")
+
+    if len(naoAlocados) > 0:
+        print("\nÓrgãos sem receptor compatível: " +
+              ", ".join(f"{orgao.TIPO} (coleta {orgao.COLETA}, {orgao.LADO})" for orgao in naoAlocados))
+
+    #Print de separação, para facilitar a legibilidade
+    print("")
+
+#======================================= VERIFICAÇÃO E BENCHMARK ======================================
+
+ESTADOS = ["SP", "RJ", "MG", "RS", "PR", "BA", "PE", "CE", "SC", "GO"]
+TIPOS = ["RIM", "FIGADO", "CORACAO", "PULMAO", "PANCREAS"]
+GRUPOS = [None] + [tipo + rh for tipo in FilaEspera.RECEPTORES_COMPATIVEIS for rh in "+-"]
+
+def GeraHLA(gerador):
+    return f"HLA-{gerador.choice('ABC')}*{gerador.randint(1, 4):02d}:{gerador.randint(1, 3):02d}"
+
+#Instância aleatória; tipos -> quantos tipos de órgão usar (menos tipos = mais disputa)
+def GeraInstancia(gerador, nOrgaos, nReceptores, tipos=TIPOS, prioridades=20):
+    receptores = [Receptor(f"{i:016X}", gerador.choice(tipos), gerador.randint(1, prioridades), gerador.choice(GRUPOS),
+                           GeraHLA(gerador) if gerador.random() < 0.9 else None, gerador.choice(ESTADOS))
+                  for i in range(nReceptores)]
+    #Às vezes o doador também está em espera (o órgão não pode ir para ele mesmo)
+    orgaos = [Orgao(gerador.choice(tipos), i, "INDIFERENTE", gerador.choice(list(FilaEspera.RECEPTORES_COMPATIVEIS)),
+                    gerador.choice("+-"), GeraHLA(gerador), gerador.choice(ESTADOS),
+                    gerador.choice(receptores).RECEPTOR if gerador.random() < 0.1 else f"D{i:015X}")
+              for i in range(nOrgaos)]
+
+    return orgaos, receptores
+
+#Compara o resultado com a força bruta em instâncias pequenas e com muita disputa
+#Também confere que toda alocação é viável e que nenhum receptor recebe dois órgãos
+def Verificacao(instancias=500, semente=0):
+    gerador = random.Random(semente)
+    erros = 0
+
+    for _ in range(instancias):
+        orgaos, receptores = GeraInstancia(gerador, gerador.randint(1, 6), gerador.randint(1, 7),
+                                           tipos=TIPOS[:2], prioridades=3)
+
+        alocacoes, _ = Aloca(orgaos, receptores)
+        obtido = (len(alocacoes), sum(custo for _, _, custo in alocacoes))
+
+        viavel = all(orgao.TIPO == receptor.TIPO_ORGAO and orgao.DOADOR != receptor.RECEPTOR
+                     and FilaEspera.Compativel(receptor.SANGUE, orgao.TIPO_SANGUINEO, orgao.RH)
+                     for orgao, receptor, _ in alocacoes)
+        unicos = len({receptor.RECEPTOR for _, receptor, _ in alocacoes}) == len(alocacoes)
+
+        erros += obtido != AlocaForcaBruta(orgaos, receptores) or not viavel or not unicos
+
+    print(f"\n==== Verificação da alocação ({instancias} instâncias pequenas contra a força bruta) ====")
+    print(f"Resultados diferentes da força bruta: {erros}")
+
+    return erros
+
+#Mede o tempo da alocação ótima e compara com a gulosa
+#tamanhos -> (órgãos, receptores); a gulosa só roda até limiteGuloso órgãos
+def Benchmark(tamanhos=((100, 1000), (500, 5000), (1000, 10000), (2000, 20000)), limiteGuloso=1000, semente=0):
+    gerador = random.Random(semente)
+    relatorio = []
+
+    for nOrgaos, nReceptores in tamanhos:
+        orgaos, receptores = GeraInstancia(gerador, nOrgaos, nReceptores)
+
+        inicio = time.perf_counter()
+        alocacoes, _ = Aloca(orgaos, receptores)
+        tempo = time.perf_counter() - inicio
+        relatorio.append([nOrgaos, nReceptores, "Ótima", len(alocacoes), sum(custo for _, _, custo in alocacoes), f"{tempo:.2f}"])
+
+        if nOrgaos <= limiteGuloso:
+            inicio = time.perf_counter()
+            alocacoes, _ = AlocaGuloso(orgaos, receptores)
+            tempo = time.perf_counter() - inicio
+            relatorio.append([nOrgaos, nReceptores, "Gulosa", len(alocacoes), sum(custo for _, _, custo in alocacoes), f"{tempo:.2f}"])
+
+    print("\n==== Benchmark da alocação ====")
+    print(tabulate(relatorio, headers=["Órgãos", "Receptores", "Forma", "Alocados", "Custo total", "Tempo (s)"], tablefmt="psql"))
+
+#Uso: python Alocacao.py
+if __name__ == "__main__":
+    Verificacao()
+    Benchmark()
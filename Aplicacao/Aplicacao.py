@@ -7,21 +7,28 @@
 import oracledb
 from tabulate import tabulate
 import re
+import sqlite3
 from datetime import datetime
 from dotenv import load_dotenv
 import os
+import time
 
-#======================================= AUXILIAR ======================================
+import Alocacao
+import BaseLocal
+import Carregador
+import Dossie
+import Duplicados
+import FilaEspera
+import Ingestao
+import Replica
 
-#Converte valores binários para hexadecimais
-def BinParaHex(val):
-    #Se for binário
-    if isinstance(val, bytes):
-        #Transforma em hexadecimal
-        return val.hex().upper()
-    
-    #Se não for, retorna sem alterar
-    return val
+#Filas de espera por órgão, carregadas na primeira vez que forem usadas e mantidas atualizadas depois
+filasEspera = None
+
+#Réplica local de leitura de PESSOA/PACIENTE, usada nas buscas quando configurada no .env (chave "replica")
+replica = None
+
+#======================================= AUXILIAR ======================================
 
 #Função de validação da escrita e dos dígitos verificadores
 def VerificaCPF(cpf):
@@ -658,7 +665,7 @@ def InsertPessoaPaciente(pool):
                 #Chama commit na base de dados, salvando os dados por definitivo
                 conn.commit()
 
-                print(f"\n\nPaciente ID = {BinParaHex(idPessoaBytes)} registrado com sucesso!")
+                print(f"\n\nPaciente ID = {BaseLocal.BinParaHex(idPessoaBytes)} registrado com sucesso!")
                 #Instrui o usuário à orientar o Paciente
                 print("Caso o paciente tenha interesse em se tornar doador de órgãos, informe-o sobre os próximos passos:")
                 print("- Ele pode manifestar sua vontade conversando com a família, que é a responsável pela autorização final.")
@@ -672,6 +679,38 @@ def InsertPessoaPaciente(pool):
     except Exception as e:
         print(f"\nErro: {e}\n")
 
+#Importa os arquivos de resultados de exames enviados pelos laboratórios (CSV, ver Ingestao.COLUNAS)
+def InsertExames(pool):
+    arquivos = input("Digite os caminhos dos arquivos, separados por vírgula: ").strip()
+
+    #Remove os vazios, caso tenha sobrado alguma vírgula
+    arquivos = [arquivo.strip() for arquivo in arquivos.split(",") if arquivo.strip() != ""]
+
+    inexistentes = [arquivo for arquivo in arquivos if not os.path.isfile(arquivo)]
+    if len(arquivos) == 0:
+        print("Nenhum arquivo digitado!\n")
+        return
+    elif len(inexistentes) > 0:
+        print("Arquivos não encontrados: " + ", ".join(inexistentes) + "\n")
+        return
+
+    try:
+        inicio = time.perf_counter()
+        resultados = Ingestao.ImportaExames(pool, arquivos)
+        Ingestao.ImprimeResultados(resultados, time.perf_counter() - inicio)
+
+        #Uma tipagem nova pode mudar o grupo sanguíneo de quem já está nas filas de espera carregadas
+        if filasEspera is not None:
+            receptores = [paciente for paciente in Ingestao.PacientesTipados(resultados) if paciente in filasEspera.esperas]
+            mudaram = FilaEspera.AtualizaTipagensBanco(pool, filasEspera, receptores)
+            if len(mudaram) > 0:
+                print(f"Receptores que mudaram de grupo sanguíneo nas filas de espera: {', '.join(mudaram)}\n")
+
+    except oracledb.Error as e:
+        print(f"\nErro oracle: {e}\n")
+    except Exception as e:
+        print(f"\nErro: {e}\n")
+
 #======================================= SELECT ======================================
 
 def SelectPessoa(pool):
@@ -709,31 +748,78 @@ def SelectPessoa(pool):
     telefone1 = input("Digite o primeiro telefone de contato ((XX)9XXXX-XXXX): ").strip() or None
     telefone2 = input("Digite o segundo telefone de contato ((XX)9XXXX-XXXX): ").strip() or None
 
-    #Todos os valores que estiverem como None serão ignorados pelo trecho ":atributo IS NULL"
-    sqlSelectPessoa = "SELECT * FROM PESSOA WHERE " \
-            "(:idPessoa IS NULL OR ID = :idPessoa) " \
-        "AND (:cpf IS NULL OR CPF = :cpf) " \
-        "AND (:nome IS NULL OR NOME LIKE '%' || :nome || '%') " \
-        "AND (:estado IS NULL OR ESTADO = :estado) " \
-        "AND (:cidade IS NULL OR CIDADE = :cidade) " \
-        "AND (:bairro IS NULL OR BAIRRO = :bairro) " \
-        "AND (:rua IS NULL OR RUA = :rua) " \
-        "AND (:numero IS NULL OR NUMERO = :numero) " \
-        "AND (:telefone1 IS NULL OR TELEFONE1 = :telefone1) " \
-        "AND (:telefone2 IS NULL OR TELEFONE2 = :telefone2)"
-
-    dados = {
-        "idPessoa": idPessoa,
-        "cpf": cpf,
-        "nome": nome,
-        "estado": estado,
-        "cidade": cidade,
-        "bairro": bairro,
-        "rua": rua,
-        "numero": numero,
-        "telefone1": telefone1,
-        "telefone2": telefone2
-    }
+    #Só os campos preenchidos entram no WHERE, cada um como uma comparação simples com a coluna,
+    #para os índices (CPF, telefones, endereço) poderem ser usados; "(:x IS NULL OR COL = :x)" obriga a ler a tabela inteira
+    #Colunas explícitas, a mesma consulta roda no banco principal e na réplica
+    filtros = [
+        ("ID = :idPessoa", "idPessoa", idPessoa),
+        ("CPF = :cpf", "cpf", cpf),
+        ("NOME LIKE '%' || :nome || '%'", "nome", nome),
+        ("ESTADO = :estado", "estado", estado),
+        ("CIDADE = :cidade", "cidade", cidade),
+        ("BAIRRO = :bairro", "bairro", bairro),
+        ("RUA = :rua", "rua", rua),
+        ("NUMERO = :numero", "numero", numero),
+        ("TELEFONE1 = :telefone1", "telefone1", telefone1),
+        ("TELEFONE2 = :telefone2", "telefone2", telefone2),
+    ]
+    filtros = [(condicao, nomeBind, valor) for condicao, nomeBind, valor in filtros if valor is not None]
+
+    sqlSelectPessoa = "SELECT ID, CPF, NOME, ESTADO, CIDADE, BAIRRO, RUA, NUMERO, TELEFONE1, TELEFONE2 FROM PESSOA"
+    if len(filtros) > 0:
+        sqlSelectPessoa += " WHERE " + " AND ".join(condicao for condicao, _, _ in filtros)
+
+    #Só os binds usados na consulta
+    dados = {nomeBind: valor for _, nomeBind, valor in filtros}
+
+    try:
+        cols, rows, origem = ConsultaLeitura(pool, sqlSelectPessoa, dados)
+
+        #Converte a primeira coluna de toda linha (o ID) de binário para hexadecimal
+        #[...] + row[1:] -> concatena o resultado da função com o restante da linha
+        hexRows = [[BaseLocal.BinParaHex(row[0])] + list(row[1:]) for row in rows]
+
+        #Imprime a tabela obtida
+        print(f"\n==== Tabela Pessoa ({origem}) ====")
+        print(tabulate(hexRows, headers=cols, tablefmt="psql"))
+
+        #Print de separação, para facilitar a legibilidade
+        print("")
+
+    except oracledb.Error as e:
+        print(f"\nErro oracle: {e}\n")
+    except Exception as e:
+        print(f"\nErro: {e}\n")
+
+#Abre a réplica local e tenta sincronizá-la; se o principal não responder, segue com o que já foi copiado antes
+#Se o arquivo da réplica não puder ser aberto ou escrito, ela é desativada (retorna None)
+def IniciaReplica(pool, caminho, defasagemMaxima):
+    try:
+        replica = Replica.Replica(caminho, defasagemMaxima)
+        copiadas = replica.Sincroniza(pool)
+        print("Linhas copiadas: " + ", ".join(f"{tabela} {n}" for tabela, n in copiadas.items()))
+    except sqlite3.Error as e:
+        print(f"\n[AVISO] Réplica local desativada, não foi possível usar o arquivo '{caminho}' ({e})\n")
+        return None
+    except oracledb.Error as e:
+        defasagem = replica.Defasagem()
+        if defasagem is None:
+            print(f"\n[AVISO] Não foi possível sincronizar a réplica ({e}); ela nunca foi sincronizada e só será usada após a primeira sincronização\n")
+        else:
+            print(f"\n[AVISO] Não foi possível sincronizar a réplica ({e}); as buscas podem usar a cópia de {defasagem:.0f}s atrás enquanto o principal estiver fora\n")
+
+    #Sincroniza na metade da defasagem máxima, para a réplica nunca passar do limite enquanto o principal responder
+    #Mesmo com o principal fora na partida, a sincronização em segundo plano o alcança quando ele voltar
+    replica.IniciaSincronizacao(pool, max(1, replica.defasagemMaxima // 2))
+    return replica
+
+#Executa uma consulta de leitura na réplica local, se ela estiver atualizada, ou no banco principal
+#Se o banco principal falhar e houver réplica, usa a réplica mesmo desatualizada, avisando o usuário
+#Retorna os nomes das colunas, as linhas e de onde vieram os dados
+def ConsultaLeitura(pool, sql, dados):
+    if replica is not None and replica.EstaAtualizada():
+        cols, rows = replica.Consulta(sql, dados)
+        return cols, rows, f"réplica local, atualizada há {replica.Defasagem():.0f}s"
 
     try:
         #Pega uma conexão com o BD
@@ -741,28 +827,316 @@ def SelectPessoa(pool):
             #Cria um cursor pra conexão
             with conn.cursor() as cursor:
                 #cursor.execute trata os dados, protegendo contra injeções
-                cursor.execute(sqlSelectPessoa, dados)
+                cursor.execute(sql, dados)
 
                 rows = cursor.fetchall()
                 #Pega o nome das colunas
                 cols = [desc[0] for desc in cursor.description]
 
-                #Converte a primeira coluna de toda linha (o ID) de binário para hexadecimal
-                #[...] + row[1:] -> concatena o resultado da função com o restante da linha
-                hexRows = [[BinParaHex(row[0])] + list(row[1:]) for row in rows]
+                return cols, rows, "banco principal"
 
-                #Imprime a tabela obtida
-                print(f"\n==== Tabela Pessoa ====")
-                print(tabulate(hexRows, headers=cols, tablefmt="psql"))
+    except oracledb.Error as e:
+        defasagem = replica.Defasagem() if replica is not None else None
+        if defasagem is None:
+            raise
 
-                #Print de separação, para facilitar a legibilidade
-                print("")
+        print(f"\n[AVISO] Banco principal indisponível ({e})")
+        cols, rows = replica.Consulta(sql, dados)
+        return cols, rows, f"réplica local DESATUALIZADA, última sincronização há {defasagem:.0f}s"
+
+#Mostra tudo o que se sabe de um ou mais pacientes (histórico, exames, internações, cirurgias, órgãos)
+def SelectDossie(pool):
+    ids = input("Digite os IDs dos pacientes, separados por vírgula (hexadecimal de até 16 caracteres): ").strip().upper()
+
+    #Remove os vazios, caso tenha sobrado alguma vírgula
+    ids = [idPessoa.strip() for idPessoa in ids.split(",") if idPessoa.strip() != ""]
+
+    #r"..." -> string raw, para evitar alertas de erros com '\'
+    invalidos = [idPessoa for idPessoa in ids if not re.match(r"^([0-9A-F]{2}){1,8}$", idPessoa)]
+    if len(ids) == 0:
+        print("Nenhum ID digitado!\n")
+        return
+    elif len(invalidos) > 0:
+        print("IDs inválidos: " + ", ".join(invalidos) + "\n")
+        return
+
+    try:
+        dossies = Dossie.BuscaDossies(pool, ids)
+
+        for idPessoa in ids:
+            if idPessoa in dossies:
+                Dossie.ImprimeDossie(idPessoa, dossies[idPessoa])
+            else:
+                print(f"\nO ID {idPessoa} não está cadastrado como paciente!")
+
+        #Print de separação, para facilitar a legibilidade
+        print("")
+
+    except oracledb.Error as e:
+        print(f"\nErro oracle: {e}\n")
+    except Exception as e:
+        print(f"\nErro: {e}\n")
+
+#Procura pessoas possivelmente cadastradas mais de uma vez (CPF, nome ou telefone digitados diferente)
+def SelectDuplicados(pool):
+    try:
+        print("Procurando pessoas duplicadas...")
+        grupos, estatisticas = Duplicados.DetectaDuplicados(Duplicados.LePessoas(pool))
+        Duplicados.ImprimeGrupos(grupos, estatisticas)
 
     except oracledb.Error as e:
         print(f"\nErro oracle: {e}\n")
     except Exception as e:
         print(f"\nErro: {e}\n")
 
+#======================================= FILA DE ESPERA ======================================
+
+#Pega um inteiro positivo digitado pelo usuário
+def GetInteiroPositivo(msg):
+    while True:
+        valor = input(msg).strip()
+
+        if valor.isdigit() and int(valor) > 0:
+            return int(valor)
+
+        print("Deve ser um inteiro positivo!")
+
+#Pega o ID de um receptor (hexadecimal de até 16 caracteres)
+def GetIdReceptor():
+    while True:
+        receptor = input("Digite o ID do receptor: ").strip().upper()
+
+        #r"..." -> string raw, para evitar alertas de erros com '\'
+        if re.match(r"^([0-9A-F]{2}){1,8}$", receptor):
+            return receptor
+
+        print("ID inválido!")
+
+#Imprime uma lista de (prioridade, receptor) da fila
+def ImprimeFila(titulo, proximos):
+    print(f"\n==== {titulo} ====")
+    print(tabulate([[i + 1, receptor, prioridade] for i, (prioridade, receptor) in enumerate(proximos)],
+                   headers=["Posição", "Receptor", "Prioridade"], tablefmt="psql"))
+
+    #Print de separação, para facilitar a legibilidade
+    print("")
+
+def MenuFilaEspera(pool):
+    global filasEspera
+
+    try:
+        #Carrega as filas uma única vez, depois só são atualizadas
+        if filasEspera is None:
+            print("Carregando as filas de espera...")
+            filasEspera = FilaEspera.CarregaFilas(pool)
+
+        while True:
+            print(
+                "\nSelecione uma função da fila de espera:\n" +
+                "[0] Ver os próximos da fila de um órgão\n" +
+                "[1] Ver os próximos compatíveis com um órgão doado\n" +
+                "[2] Alterar a prioridade de um receptor\n" +
+                "[3] Remover um receptor da fila (transplante realizado)\n" +
+                "[4] Verificar a consistência com a base de dados\n" +
+                "[5] Propor a alocação global dos órgãos disponíveis\n" +
+                "[6] Adicionar um receptor à fila de um órgão\n" +
+                "[7] Registrar o óbito de um receptor (sai de todas as filas)\n" +
+                "[8] Voltar\n"
+            )
+
+            comando = input("Digite a função desejada: ").strip()
+
+            match comando:
+                case '0':
+                    tipoOrgao = input("Digite o tipo de órgão: ").strip().upper()
+                    n = GetInteiroPositivo("Digite quantos receptores listar: ")
+
+                    ImprimeFila(f"Fila de {tipoOrgao}", filasEspera.Proximos(tipoOrgao, n))
+                case '1':
+                    tipoOrgao = input("Digite o tipo de órgão: ").strip().upper()
+
+                    while True:
+                        tipoSanguineo = input("Digite o tipo sanguíneo do órgão (A, B, AB, O): ").strip().upper()
+
+                        if tipoSanguineo not in FilaEspera.RECEPTORES_COMPATIVEIS:
+                            print("Tipo sanguíneo inválido!")
+                        else:
+                            break
+
+                    while True:
+                        rh = input("Digite o Rh do órgão (+/-): ").strip()
+
+                        if rh not in {"+", "-"}:
+                            print("Rh inválido!")
+                        else:
+                            break
+
+                    n = GetInteiroPositivo("Digite quantos receptores listar: ")
+
+                    ImprimeFila(f"Compatíveis com {tipoOrgao} {tipoSanguineo}{rh}",
+                                filasEspera.ProximosCompativeis(tipoOrgao, tipoSanguineo, rh, n))
+                case '2':
+                    receptor = GetIdReceptor()
+                    tipoOrgao = input("Digite o tipo de órgão: ").strip().upper()
+
+                    if filasEspera.Prioridade(receptor, tipoOrgao) is None:
+                        print("Receptor não está na fila deste órgão!")
+                        continue
+
+                    prioridade = GetInteiroPositivo("Digite a nova prioridade (1 é a máxima): ")
+                    if FilaEspera.AtualizaPrioridadeBanco(pool, filasEspera, receptor, tipoOrgao, prioridade):
+                        print("Prioridade atualizada com sucesso!")
+                    else:
+                        print("Espera não encontrada na base de dados, nada foi alterado! Verifique a consistência das filas (opção 4).")
+                case '3':
+                    receptor = GetIdReceptor()
+                    tipoOrgao = input("Digite o tipo de órgão: ").strip().upper()
+
+                    if filasEspera.Prioridade(receptor, tipoOrgao) is None:
+                        print("Receptor não está na fila deste órgão!")
+                        continue
+
+                    if GetConfirmacao("Confirma a remoção do receptor da fila?") == 'S':
+                        if FilaEspera.RemoveEsperaBanco(pool, filasEspera, receptor, tipoOrgao):
+                            print("Receptor removido da fila!")
+                        else:
+                            print("Espera não encontrada na base de dados, nada foi removido! Verifique a consistência das filas (opção 4).")
+                case '4':
+                    divergencias = FilaEspera.VerificaConsistencia(pool, filasEspera)
+
+                    if len(divergencias) == 0:
+                        print("Filas consistentes com a tabela RECEPTOR_ESPERA!")
+                    else:
+                        for divergencia in divergencias:
+                            print("- " + divergencia)
+
+                        #Em caso de divergência, a tabela é a referência
+                        if GetConfirmacao("Recarregar as filas a partir da base de dados?") == 'S':
+                            filasEspera = FilaEspera.CarregaFilas(pool)
+                case '5':
+                    orgaos, receptores = Alocacao.CarregaInstancia(pool)
+                    alocacoes, naoAlocados = Alocacao.Aloca(orgaos, receptores)
+                    Alocacao.ImprimeAlocacao(alocacoes, naoAlocados)
+                case '6':
+                    receptor = GetIdReceptor()
+                    tipoOrgao = input("Digite o tipo de órgão: ").strip().upper()
+
+                    if filasEspera.Prioridade(receptor, tipoOrgao) is not None:
+                        print("Receptor já está na fila deste órgão!")
+                        continue
+
+                    paciente = FilaEspera.LePaciente(pool, receptor)
+                    if paciente is None:
+                        print("O ID não está cadastrado como paciente!")
+                        continue
+                    elif paciente[1] is not None:
+                        print("Paciente com óbito registrado!")
+                        continue
+
+                    prioridade = GetInteiroPositivo("Digite a prioridade (1 é a máxima): ")
+                    FilaEspera.AdicionaEsperaBanco(pool, filasEspera, receptor, tipoOrgao, prioridade)
+                    print(f"Receptor adicionado à fila (grupo sanguíneo: {filasEspera.sangue[receptor] or 'sem tipagem'})!")
+                case '7':
+                    receptor = GetIdReceptor()
+
+                    if receptor not in filasEspera.esperas:
+                        print("Receptor não está em nenhuma fila!")
+                        continue
+
+                    nascimento = FilaEspera.LePaciente(pool, receptor)[0]
+                    while True:
+                        obito = input("Digite a data e horário de óbito (Ano-Mês-Dia Hora:Minuto:Segundo): ").strip()
+
+                        try:
+                            obito = datetime.strptime(obito, '%Y-%m-%d %H:%M:%S')
+
+                            if obito > datetime.today():
+                                print("Data não pode estar no futuro!")
+                            elif obito < nascimento:
+                                print("Não pode ter falecido antes de nascer!")
+                            else:
+                                break
+
+                        except ValueError:
+                            print("Data ou hora inválida!")
+
+                    filas = ", ".join(sorted(filasEspera.esperas[receptor]))
+                    if GetConfirmacao(f"Confirma o óbito? O receptor sairá das filas de {filas}") == 'S':
+                        if FilaEspera.RegistraObitoBanco(pool, filasEspera, receptor, obito):
+                            print("Óbito registrado e receptor removido das filas!")
+                        else:
+                            print("Paciente não encontrado na base de dados, nada foi alterado! Verifique a consistência das filas (opção 4).")
+                case '8':
+                    #Print de separação, para facilitar a legibilidade
+                    print("")
+                    return
+                case _:
+                    print("Comando inválido!")
+
+    except oracledb.Error as e:
+        print(f"\nErro oracle: {e}\n")
+    except Exception as e:
+        print(f"\nErro: {e}\n")
+
+#======================================= CARGA ======================================
+
+#Cria as tabelas e/ou insere os dados iniciais a partir dos scripts da pasta SQL
+def CarregaBase(pool):
+    criarEsquema = GetConfirmacao("Criar as tabelas (SQL/esquema.sql)?") == 'S'
+    inserirDados = GetConfirmacao("Inserir os dados iniciais (SQL/dados.sql)?") == 'S'
+
+    if not criarEsquema and not inserirDados:
+        #Print de separação, para facilitar a legibilidade
+        print("")
+        return
+
+    try:
+        Carregador.CarregaBase(pool, criarEsquema, inserirDados)
+    except oracledb.Error as e:
+        print(f"\nErro oracle: {e}\n")
+    except Exception as e:
+        print(f"\nErro: {e}\n")
+
+#======================================= MENU ======================================
+
+#Menu principal, repete até o usuário escolher fechar o programa
+def Menu(pool):
+    while True:
+        print(
+            "Selecione uma função:\n" +
+            "[0] Inserir um novo paciente\n" +
+            "[1] Procurar uma pessoa\n" +
+            "[2] Ver o dossiê de pacientes\n" +
+            "[3] Fila de espera por órgão\n" +
+            "[4] Carregar esquema e dados iniciais\n" +
+            "[5] Procurar pessoas duplicadas\n" +
+            "[6] Importar resultados de exames dos laboratórios\n" +
+            "[7] Fechar o programa\n"
+        )
+
+        comando = input("Digite a função desejada: ").strip()
+
+        match comando:
+            case '0':
+                InsertPessoaPaciente(pool)
+            case '1':
+                SelectPessoa(pool)
+            case '2':
+                SelectDossie(pool)
+            case '3':
+                MenuFilaEspera(pool)
+            case '4':
+                CarregaBase(pool)
+            case '5':
+                SelectDuplicados(pool)
+            case '6':
+                InsertExames(pool)
+            case '7':
+                print("\nEncerrando o código...")
+                break
+            case _:
+                print("Comando inválido!\n")
+
 #======================================= MAIN ======================================
 
 if __name__ == "__main__":
@@ -775,6 +1149,9 @@ if __name__ == "__main__":
     db_service = os.getenv("service_name")
     db_user = os.getenv("user")
     db_pass = os.getenv("password")
+    #Opcionais: arquivo da réplica local de leitura e defasagem máxima aceita (segundos)
+    db_replica = os.getenv("replica")
+    db_replica_defasagem = os.getenv("replica_defasagem")
 
     #Se algum dado estiver faltando (ou o .env em si)
     if not all([db_host, db_port, db_service, db_user, db_pass]):
@@ -782,6 +1159,15 @@ if __name__ == "__main__":
         print("Verifique: host, port, service_name, user, password\n")
         exit()
 
+    #A defasagem é em segundos inteiros; sem ela no .env, usa 60
+    defasagemReplica = 60
+    if db_replica_defasagem:
+        if not db_replica_defasagem.strip().isdigit() or int(db_replica_defasagem) == 0:
+            print("\n[ERRO] replica_defasagem inválida no .env!\n")
+            print(f"Deve ser um número inteiro de segundos maior que zero (recebido: {db_replica_defasagem!r})\n")
+            exit()
+        defasagemReplica = int(db_replica_defasagem)
+
     dsn = oracledb.makedsn(host=db_host, port=db_port, service_name=db_service)
 
     pool = None
@@ -792,38 +1178,26 @@ if __name__ == "__main__":
             password=db_pass,
             dsn=dsn,
             min=1,
-            max=2,
+            #A carga da base usa uma conexão por tabela em paralelo
+            max=4,
             increment=1
         )
-        print("Sistema iniciado com sucesso!\n")
-
-        while True:
-            print(
-                "Selecione uma função:\n" +
-                "[0] Inserir um novo paciente\n" +
-                "[1] Procurar uma pessoa\n" +
-                "[2] Fechar o programa\n"
-            )
+        if db_replica:
+            print("Sincronizando a réplica local...")
+            replica = IniciaReplica(pool, db_replica, defasagemReplica)
 
-            comando = input("Digite a função desejada: ").strip()
+        print("Sistema iniciado com sucesso!\n")
 
-            match comando:
-                case '0':
-                    InsertPessoaPaciente(pool)
-                case '1':
-                    SelectPessoa(pool)
-                case '2':
-                    print("\nEncerrando o código...")
-                    break
-                case _:
-                    print("Comando inválido!\n")
+        Menu(pool)
 
     except oracledb.Error as e:
         print(f"\n[ERRO FATAL DE CONEXÃO]: {e}")
     except KeyboardInterrupt:
         print("\n\nEncerrando forçadamente pelo usuário...")
-    #Independentemente do erro esse trecho irá rodar, até mesmo se não ocorrer (comando '2')
+    #Independentemente do erro esse trecho irá rodar, até mesmo se não ocorrer (comando '7')
     finally:
+        if replica is not None:
+            replica.Para()
         if pool is not None:
             pool.close()
             print("Conexão com o banco encerrada.\n")
\ No newline at end of file
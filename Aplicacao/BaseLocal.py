@@ -0,0 +1,399 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Base de dados local (SQLite) que imita a interface do pool do oracledb
+#Serve para testar a aplicação e as cargas sem precisar de um servidor Oracle
+
+import sqlite3
+import re
+import os
+import tempfile
+import threading
+import time
+import random
+from datetime import datetime, timedelta
+
+#======================================= CONVERSÕES ======================================
+
+#Datas são salvas como texto ISO e voltam como datetime, igual ao oracledb
+sqlite3.register_adapter(datetime, lambda val: val.isoformat(" "))
+sqlite3.register_converter("DATE", lambda val: datetime.fromisoformat(val.decode()))
+
+#Intervalos (INTERVAL DAY TO SECOND) são salvos em segundos e voltam como timedelta
+sqlite3.register_adapter(timedelta, lambda val: val.total_seconds())
+sqlite3.register_converter("INTERVAL", lambda val: timedelta(seconds=float(val)))
+
+#Troca os binds posicionais do Oracle (:1, :2, ...) pelos do SQLite (?1, ?2, ...)
+#Ignora o que estiver dentro de strings, como horários '08:00:00'
+def TraduzBinds(sql):
+    partes = re.split(r"('(?:[^']|'')*')", sql)
+
+    #As partes ímpares são as strings, que ficam intactas
+    for i in range(0, len(partes), 2):
+        partes[i] = re.sub(r":(\d+)", r"?\1", partes[i])
+
+    return "".join(partes)
+
+#Traduz um CREATE TABLE do esquema Oracle para o SQLite, retornando a lista de comandos de criação
+#Restrições CHECK são descartadas (usam REGEXP_LIKE, EXTRACT e INTERVAL), a aplicação já valida esses dados
+#Tabelas com ROWDEPENDENCIES ganham uma coluna ORA_ROWSCN, mantida por triggers com um contador global,
+#que faz o papel do SCN do Oracle (cresce a cada alteração; as escritas no SQLite são serializadas)
+def TraduzCreateTable(ddl):
+    inicio = ddl.index("(")
+    fim = ddl.rindex(")")
+    cabecalho = ddl[:inicio]
+
+    #Separa as colunas e restrições pelas vírgulas de primeiro nível
+    itens = []
+    nivel = 0
+    atual = ""
+    for c in ddl[inicio + 1:fim]:
+        if c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+
+        if c == "," and nivel == 0:
+            itens.append(atual.strip())
+            atual = ""
+        else:
+            atual += c
+    itens.append(atual.strip())
+
+    traduzidos = []
+    for item in itens:
+        #Sem os espaços extras, facilita as regex
+        item = " ".join(item.split())
+        if item == "":
+            continue
+
+        if re.match(r"^CONSTRAINT \w+ CHECK", item, re.IGNORECASE):
+            continue
+
+        if re.match(r"^CONSTRAINT ", item, re.IGNORECASE):
+            traduzidos.append(item)
+            continue
+
+        #Definição de coluna
+        nome, tipo, resto = re.match(r"^(\w+) (\w+(?:\s*\([^)]*\))?)(.*)$", item).groups()
+        tipoBase = tipo.split("(")[0].upper()
+
+        if "GENERATED ALWAYS AS IDENTITY" in resto.upper():
+            #INTEGER exato + PRIMARY KEY de uma coluna vira o ROWID, que se numera sozinho
+            tipo = "INTEGER"
+            resto = re.sub(r"GENERATED ALWAYS AS IDENTITY", "", resto, flags=re.IGNORECASE)
+        elif tipoBase == "RAW":
+            #Os IDs ficam como texto hexadecimal, o mesmo que os dados iniciais usam
+            tipo = "TEXT"
+        elif tipoBase == "INTERVAL":
+            tipo = "INTERVAL"
+            resto = re.sub(r"DAY\s*\(\d\)\s*TO\s*SECOND\s*\(\d\)", "", resto, flags=re.IGNORECASE)
+
+        #DEFAULT SUBSTR(SYS_GUID(), 1, N) -> N caracteres hexadecimais aleatórios
+        guid = re.search(r"DEFAULT SUBSTR\(SYS_GUID\(\), 1, (\d+)\)", resto, re.IGNORECASE)
+        if guid is not None:
+            resto = resto.replace(guid.group(0), f"DEFAULT (UPPER(HEX(RANDOMBLOB({int(guid.group(1)) // 2}))))")
+
+        traduzidos.append(f"{nome} {tipo} {resto.strip()}".strip())
+
+    comandos = [cabecalho + "(\n    " + ",\n    ".join(traduzidos) + "\n)"]
+
+    if re.search(r"ROWDEPENDENCIES", ddl[fim:], re.IGNORECASE):
+        tabela = re.match(r"CREATE\s+TABLE\s+(\w+)", cabecalho, re.IGNORECASE).group(1)
+        colunas = [re.match(r"^(\w+)", item).group(1) for item in traduzidos if not item.upper().startswith("CONSTRAINT ")]
+
+        #A coluna nova entra depois das outras colunas e antes das restrições
+        traduzidos.insert(len(colunas), "ORA_ROWSCN INTEGER")
+        comandos = [cabecalho + "(\n    " + ",\n    ".join(traduzidos) + "\n)"]
+
+        comandos.append("CREATE TABLE IF NOT EXISTS SCN_LOCAL (VALOR INTEGER NOT NULL)")
+        comandos.append("INSERT INTO SCN_LOCAL (VALOR) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM SCN_LOCAL)")
+        #UPDATE OF sem ORA_ROWSCN, para o próprio trigger não disparar de novo
+        for evento in ("INSERT", f"UPDATE OF {', '.join(colunas)}"):
+            nome = f"TRG_{tabela}_SCN_{evento.split()[0]}"
+            comandos.append(
+                f"CREATE TRIGGER {nome} AFTER {evento} ON {tabela} BEGIN "
+                f"UPDATE SCN_LOCAL SET VALOR = VALOR + 1; "
+                f"UPDATE {tabela} SET ORA_ROWSCN = (SELECT VALOR FROM SCN_LOCAL) WHERE ROWID = NEW.ROWID; "
+                f"END")
+
+    return comandos
+
+#======================================= INTERFACE ======================================
+
+#Substitui cursor.var(), usado pelo RETURNING INTO
+class VariavelLocal:
+    def __init__(self, tipo=None):
+        self.tipo = tipo
+        self.valor = None
+
+    def setvalue(self, pos, valor):
+        self.valor = valor
+
+    #O oracledb devolve uma lista de valores para DMLs com RETURNING
+    def getvalue(self, pos=0):
+        return [self.valor]
+
+#Erro de uma linha do executemany com batcherrors=True, mesmos atributos do oracledb
+class ErroLoteLocal:
+    def __init__(self, offset, message):
+        self.offset = offset
+        self.message = message
+
+class CursorLocal:
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.errosLote = []
+        self.arraysize = 100
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def var(self, tipo=None, *args, **kwargs):
+        return VariavelLocal(tipo)
+
+    #Não há tipos de bind para definir no SQLite
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    def execute(self, sql, parametros=None, **kwargs):
+        sql = TraduzBinds(sql)
+        parametros = parametros if parametros is not None else kwargs
+
+        #RETURNING ... INTO :var -> RETURNING ..., guardando o resultado na variável
+        retorno = re.search(r"\s+RETURNING\s+(.+?)\s+INTO\s+:(\w+)\s*$", sql, re.IGNORECASE | re.DOTALL)
+        if retorno is not None:
+            variavel = parametros[retorno.group(2)]
+            parametros = {k: v for k, v in parametros.items() if k != retorno.group(2)}
+
+            self.cursor.execute(sql[:retorno.start()] + " RETURNING " + retorno.group(1), parametros)
+            variavel.setvalue(0, self.cursor.fetchone()[0])
+            #Consome o restante para liberar a instrução
+            self.cursor.fetchall()
+            return
+
+        self.cursor.execute(sql, parametros)
+
+    def executemany(self, sql, linhas, batcherrors=False, **kwargs):
+        sql = TraduzBinds(sql)
+        self.errosLote = []
+
+        if not batcherrors:
+            self.cursor.executemany(sql, linhas)
+            return
+
+        #Com batcherrors, as linhas com erro são anotadas e o restante continua
+        for i, linha in enumerate(linhas):
+            try:
+                self.cursor.execute(sql, linha)
+            except sqlite3.Error as e:
+                self.errosLote.append(ErroLoteLocal(i, str(e)))
+
+    def getbatcherrors(self):
+        return self.errosLote
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchmany(self, tamanho=None):
+        return self.cursor.fetchmany(tamanho or self.arraysize)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def close(self):
+        self.cursor.close()
+
+class ConexaoLocal:
+    def __init__(self, conn):
+        self.conn = conn
+
+    #Igual ao pool do oracledb, sair do bloco devolve a conexão e descarta o que não teve commit
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def cursor(self):
+        return CursorLocal(self.conn)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.rollback()
+        self.conn.close()
+
+#Pool de conexões SQLite com a mesma interface usada do oracledb.ConnectionPool
+#Sem caminho, cria uma base temporária que é apagada quando o pool fecha
+#(uma base em memória compartilhada não aceita escritas concorrentes de conexões diferentes)
+class PoolLocal:
+    def __init__(self, caminho=None, max=4):
+        self.max = max
+        self.temporario = caminho is None
+
+        if self.temporario:
+            arquivo, caminho = tempfile.mkstemp(prefix="baselocal", suffix=".db")
+            os.close(arquivo)
+
+        self.caminho = caminho
+
+    def acquire(self):
+        #timeout -> espera o outro escritor terminar em vez de falhar na hora
+        conn = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return ConexaoLocal(conn)
+
+    def close(self):
+        if self.temporario and os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+#Verifica se o pool é uma base local, mesmo se estiver envolvido por um ou mais invólucros (PoolMedido, ...)
+def EhLocal(pool):
+    while hasattr(pool, "pool"):
+        pool = pool.pool
+
+    return isinstance(pool, PoolLocal)
+
+#Converte um ID hexadecimal para o bind da base: bytes no Oracle (RAW), texto na base local
+def BindId(pool, idHex):
+    return idHex if EhLocal(pool) else bytes.fromhex(idHex)
+
+#Caminho inverso: um ID lido da base (RAW no Oracle, texto na base local) em hexadecimal maiúsculo
+def IdHex(val):
+    return val.hex().upper() if isinstance(val, bytes) else val.upper()
+
+#Para exibição: binários viram hexadecimal e os demais valores (nulos, números, datas) ficam como estão
+def BinParaHex(val):
+    return val.hex().upper() if isinstance(val, bytes) else val
+
+#======================================= MEDIÇÃO ======================================
+
+#Envolve um pool (Oracle ou local) contando os comandos enviados ao banco
+#latencia -> segundos de espera por comando, para simular a rede numa base local
+class PoolMedido:
+    def __init__(self, pool, latencia=0.0):
+        self.pool = pool
+        self.max = pool.max
+        self.latencia = latencia
+        self.idas = 0
+        self.trava = threading.Lock()
+
+    def acquire(self):
+        return ConexaoMedida(self, self.pool.acquire())
+
+    def close(self):
+        self.pool.close()
+
+    def ContaIda(self):
+        with self.trava:
+            self.idas += 1
+
+        if self.latencia > 0:
+            time.sleep(self.latencia)
+
+class ConexaoMedida:
+    def __init__(self, medidor, conn):
+        self.medidor = medidor
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.conn.__exit__(*args)
+
+    #O restante (commit, gettype, ...) vai direto para a conexão
+    def __getattr__(self, nome):
+        return getattr(self.conn, nome)
+
+    def cursor(self):
+        return CursorMedido(self.medidor, self.conn.cursor())
+
+    def commit(self):
+        self.medidor.ContaIda()
+        self.conn.commit()
+
+class CursorMedido:
+    def __init__(self, medidor, cursor):
+        self.medidor = medidor
+        self.cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cursor.close()
+
+    def __getattr__(self, nome):
+        return getattr(self.cursor, nome)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def execute(self, *args, **kwargs):
+        self.medidor.ContaIda()
+        return self.cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.medidor.ContaIda()
+        return self.cursor.executemany(*args, **kwargs)
+
+#======================================= DADOS SINTÉTICOS ======================================
+
+#Insere pacientes fictícios (PESSOA, PACIENTE, HISTORICO_PACIENTE e EXAME) numa base já carregada com os dados iniciais
+#Retorna os IDs criados, em hexadecimal
+def InserePacientesSinteticos(pool, quantidade, semente=0):
+    gerador = random.Random(semente)
+    ids = [f"{gerador.getrandbits(64):016X}" for _ in range(quantidade)]
+
+    pessoas = []
+    pacientes = []
+    historicos = []
+    exames = []
+    for i, idPessoa in enumerate(ids):
+        #CPF sequencial a partir de 900.000.000-00, só precisa ser único (a base local não tem as restrições CHECK)
+        numeros = f"{90000000000 + i:011d}"
+        cpf = f"{numeros[:3]}.{numeros[3:6]}.{numeros[6:9]}-{numeros[9:]}"
+        pessoas.append([idPessoa, cpf, f"PACIENTE SINTETICO {i}", gerador.choice(["SP", "RJ", "MG"])])
+        nascimento = datetime(1950, 1, 1) + timedelta(days=gerador.randrange(25000))
+        pacientes.append([idPessoa, gerador.choice("MF"), nascimento, gerador.choice(["BRANCO", "PRETO", "PARDO"]),
+                          round(gerador.uniform(40, 120), 2)])
+        for j in range(2):
+            historicos.append([idPessoa, nascimento + timedelta(days=3650 * (j + 1)), "J45", "HISTORICO SINTETICO"])
+        exames.append([idPessoa, "111111", nascimento + timedelta(days=7000), "HEMOGRAMA COMPLETO",
+                       "AAAA1111AAAA1111", "TIPO SANGUINEO " + gerador.choice(["O+", "A+", "B-", "AB+"])])
+
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.executemany("INSERT INTO PESSOA (ID, CPF, NOME, ESTADO) VALUES (:1, :2, :3, :4)", pessoas)
+            cursor.executemany("INSERT INTO PACIENTE (PESSOA, SEXO, NASCIMENTO, COR, PESO) VALUES (:1, :2, :3, :4, :5)", pacientes)
+            cursor.executemany("INSERT INTO HISTORICO_PACIENTE (PACIENTE, DATA_HORARIO, CID, DESCRICAO) VALUES (:1, :2, :3, :4)", historicos)
+            cursor.executemany("INSERT INTO EXAME (PACIENTE, LABORATORIO, DATA_HORARIO, TIPO, MEDICO_SUPERVISOR, RESULTADO) "
+                               "VALUES (:1, :2, :3, :4, :5, :6)", exames)
+            conn.commit()
+
+    return ids
@@ -0,0 +1,359 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Carga do esquema (SQL/esquema.sql) e dos dados iniciais (SQL/dados.sql)
+#As tabelas são ordenadas pelas chaves estrangeiras (REFERENCES) e carregadas em níveis:
+#tabelas de um mesmo nível não dependem umas das outras, então vão em paralelo, cada uma com sua conexão
+
+from tabulate import tabulate
+import re
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import BaseLocal
+
+#Caminhos padrão dos scripts, relativos a esta pasta
+CAMINHO_ESQUEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SQL", "esquema.sql")
+CAMINHO_DADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SQL", "dados.sql")
+
+#======================================= LEITURA ======================================
+
+#Divide um script em comandos, removendo os comentários '--'
+#';' e '--' dentro de strings não são considerados
+def DivideComandos(texto):
+    comandos = []
+    atual = ""
+    emString = False
+    i = 0
+
+    while i < len(texto):
+        c = texto[i]
+
+        if emString:
+            atual += c
+            if c == "'":
+                emString = False
+        elif c == "'":
+            atual += c
+            emString = True
+        elif texto.startswith("--", i):
+            #Pula até o fim da linha
+            fimLinha = texto.find("\n", i)
+            i = len(texto) if fimLinha == -1 else fimLinha
+            continue
+        elif c == ";":
+            if atual.strip() != "":
+                comandos.append(atual.strip())
+            atual = ""
+        else:
+            atual += c
+
+        i += 1
+
+    if atual.strip() != "":
+        comandos.append(atual.strip())
+
+    return comandos
+
+#Divide uma lista de valores pelas vírgulas de primeiro nível (fora de strings e parênteses)
+def DivideValores(texto):
+    valores = []
+    atual = ""
+    nivel = 0
+    emString = False
+
+    for c in texto:
+        if emString:
+            if c == "'":
+                emString = False
+        elif c == "'":
+            emString = True
+        elif c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+        elif c == "," and nivel == 0:
+            valores.append(atual.strip())
+            atual = ""
+            continue
+
+        atual += c
+
+    valores.append(atual.strip())
+    return valores
+
+#Converte uma string SQL ('...') em str
+def ConverteString(texto):
+    return texto[1:-1].replace("''", "'")
+
+#Converte um TO_DATE('valor', 'formato') em datetime
+#O Oracle ignora a pontuação do formato ('YYYY/MM/DD' aceita '2025-11-15'), então só os números são usados
+def ConverteData(valor, formato):
+    campos = re.findall(r"YYYY|MM|DD|HH24|MI|SS", formato.upper())
+    numeros = [int(n) for n in re.findall(r"\d+", valor)]
+
+    partes = dict(zip(campos, numeros))
+    return datetime(partes["YYYY"], partes["MM"], partes["DD"],
+                    partes.get("HH24", 0), partes.get("MI", 0), partes.get("SS", 0))
+
+#Converte um INTERVAL 'valor' UNIDADE [TO UNIDADE] em timedelta
+#Os números do valor são atribuídos às unidades seguintes à inicial, ex.: '1:30' HOUR TO MINUTE
+def ConverteIntervalo(valor, unidadeInicial):
+    unidades = ["DAY", "HOUR", "MINUTE", "SECOND"]
+    numeros = [int(n) for n in re.findall(r"\d+", valor)]
+
+    partes = dict(zip(unidades[unidades.index(unidadeInicial):], numeros))
+    return timedelta(days=partes.get("DAY", 0), hours=partes.get("HOUR", 0),
+                     minutes=partes.get("MINUTE", 0), seconds=partes.get("SECOND", 0))
+
+#Converte uma expressão de VALUES em valor Python, para ser usada como bind
+#Retorna (True, valor) se conseguiu, (False, None) se a expressão não for reconhecida
+def ConverteValor(expressao):
+    expressao = expressao.strip()
+    texto = r"'((?:[^']|'')*)'"
+
+    if expressao.upper() == "NULL":
+        return True, None
+
+    if re.fullmatch(texto, expressao):
+        return True, ConverteString(expressao)
+
+    if re.fullmatch(r"-?\d+", expressao):
+        return True, int(expressao)
+
+    if re.fullmatch(r"-?\d*\.\d+", expressao):
+        return True, float(expressao)
+
+    data = re.fullmatch(r"DATE\s*" + texto, expressao, re.IGNORECASE)
+    if data is not None:
+        return True, datetime.strptime(data.group(1), "%Y-%m-%d")
+
+    data = re.fullmatch(r"TO_DATE\s*\(\s*" + texto + r"\s*,\s*" + texto + r"\s*\)", expressao, re.IGNORECASE)
+    if data is not None:
+        return True, ConverteData(data.group(1), data.group(2))
+
+    intervalo = re.fullmatch(r"INTERVAL\s*" + texto + r"\s*(DAY|HOUR|MINUTE|SECOND)(\s+TO\s+\w+)?", expressao, re.IGNORECASE)
+    if intervalo is not None:
+        return True, ConverteIntervalo(intervalo.group(1), intervalo.group(2).upper())
+
+    return False, None
+
+#Lê o esquema e retorna, para cada tabela, o seu CREATE TABLE, as tabelas que ela referencia,
+#as suas colunas e quais delas têm valor padrão (DEFAULT ou IDENTITY)
+def LeEsquema(caminho=CAMINHO_ESQUEMA):
+    with open(caminho, encoding="utf-8") as arquivo:
+        comandos = DivideComandos(arquivo.read())
+
+    tabelas = {}
+    for comando in comandos:
+        criacao = re.match(r"CREATE\s+TABLE\s+(\w+)", comando, re.IGNORECASE)
+        if criacao is None:
+            continue
+
+        nome = criacao.group(1).upper()
+        #Referências para a própria tabela não impedem a carga
+        dependencias = {ref.upper() for ref in re.findall(r"REFERENCES\s+(\w+)", comando, re.IGNORECASE)} - {nome}
+
+        colunas = []
+        comPadrao = set()
+        for item in DivideValores(comando[comando.index("(") + 1:comando.rindex(")")]):
+            coluna = re.match(r"(\w+)\s", item)
+            if coluna is None or coluna.group(1).upper() == "CONSTRAINT":
+                continue
+
+            colunas.append(coluna.group(1).upper())
+            if re.search(r"\bDEFAULT\b|\bIDENTITY\b", item, re.IGNORECASE):
+                comPadrao.add(coluna.group(1).upper())
+
+        tabelas[nome] = {"DDL": comando, "DEPENDENCIAS": dependencias, "COLUNAS": colunas, "PADRAO": comPadrao}
+
+    return tabelas
+
+#Lê os dados iniciais e agrupa os INSERTs de cada tabela em lotes
+#INSERTs seguidos com as mesmas colunas viram um único lote (executemany), preservando a ordem
+#(a ordem importa para as colunas IDENTITY, como CIRURGIA.ID, referenciadas pelos dados seguintes)
+#Com o esquema, colunas omitidas sem valor padrão são completadas com NULL, juntando mais INSERTs no mesmo lote
+#Retorna os lotes por tabela e os comandos que devem rodar depois da carga (ex.: EXEC DBMS_STATS)
+def LeDados(caminho=CAMINHO_DADOS, tabelas=None):
+    with open(caminho, encoding="utf-8") as arquivo:
+        comandos = DivideComandos(arquivo.read())
+
+    lotes = {}
+    posCarga = []
+    for comando in comandos:
+        insercao = re.match(r"INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*\((.*)\)$", comando, re.IGNORECASE | re.DOTALL)
+
+        if insercao is None:
+            posCarga.append(comando)
+            continue
+
+        tabela = insercao.group(1).upper()
+        colunas = tuple(col.strip().upper() for col in insercao.group(2).split(","))
+        convertidos = [ConverteValor(expr) for expr in DivideValores(insercao.group(3))]
+        lotesTabela = lotes.setdefault(tabela, [])
+
+        #Se alguma expressão não for reconhecida, o comando é executado como está
+        if not all(ok for ok, _ in convertidos) or len(convertidos) != len(colunas):
+            lotesTabela.append({"COLUNAS": None, "LINHAS": [comando]})
+            continue
+
+        valores = dict(zip(colunas, (valor for _, valor in convertidos)))
+        if tabelas is not None and tabela in tabelas:
+            info = tabelas[tabela]
+            colunas = tuple(col for col in info["COLUNAS"] if col not in info["PADRAO"] or col in valores)
+
+        linha = [valores.get(col) for col in colunas]
+        if len(lotesTabela) > 0 and lotesTabela[-1]["COLUNAS"] == colunas:
+            lotesTabela[-1]["LINHAS"].append(linha)
+        else:
+            lotesTabela.append({"COLUNAS": colunas, "LINHAS": [linha]})
+
+    return lotes, posCarga
+
+#Ordena as tabelas em níveis topológicos (algoritmo de Kahn)
+#Cada nível só depende dos anteriores
+def CalculaNiveis(dependencias):
+    restantes = {tabela: set(deps) & set(dependencias) for tabela, deps in dependencias.items()}
+    niveis = []
+
+    while len(restantes) > 0:
+        nivel = sorted(tabela for tabela, deps in restantes.items() if len(deps) == 0)
+
+        if len(nivel) == 0:
+            raise ValueError("Dependência circular entre as tabelas: " + ", ".join(sorted(restantes)))
+
+        niveis.append(nivel)
+        for tabela in nivel:
+            del restantes[tabela]
+        for deps in restantes.values():
+            deps.difference_update(nivel)
+
+    return niveis
+
+#======================================= CARGA ======================================
+
+#Cria uma tabela (ddl é a lista de comandos de criação) e insere os seus lotes, com uma conexão própria do pool
+#Retorna o número de linhas, o número de idas ao banco e os tempos de criação e de inserção
+def CarregaTabela(pool, tabela, ddl, lotes):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            inicio = time.perf_counter()
+            for comando in ddl or []:
+                cursor.execute(comando)
+            tempoCriacao = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            linhas = 0
+            idas = 0
+            for lote in lotes:
+                if lote["COLUNAS"] is None:
+                    cursor.execute(lote["LINHAS"][0])
+                else:
+                    binds = ", ".join(f":{i + 1}" for i in range(len(lote["COLUNAS"])))
+                    sqlInsert = f"INSERT INTO {tabela} ({', '.join(lote['COLUNAS'])}) VALUES ({binds})"
+                    cursor.executemany(sqlInsert, lote["LINHAS"])
+
+                linhas += len(lote["LINHAS"])
+                idas += 1
+
+            conn.commit()
+            tempoInsercao = time.perf_counter() - inicio
+
+    return linhas, idas, tempoCriacao, tempoInsercao
+
+#Carrega o esquema e/ou os dados na base do pool (Oracle ou BaseLocal.PoolLocal)
+#Retorna as linhas do relatório, ou None se algo falhou
+def CarregaBase(pool, criarEsquema=True, inserirDados=True, paralelismo=None,
+                caminhoEsquema=CAMINHO_ESQUEMA, caminhoDados=CAMINHO_DADOS):
+    local = BaseLocal.EhLocal(pool)
+    tabelas = LeEsquema(caminhoEsquema)
+    lotes, posCarga = LeDados(caminhoDados, tabelas) if inserirDados else ({}, [])
+
+    desconhecidas = set(lotes) - set(tabelas)
+    if len(desconhecidas) > 0:
+        print("\nTabelas nos dados que não estão no esquema: " + ", ".join(sorted(desconhecidas)) + "\n")
+        return None
+
+    niveis = CalculaNiveis({tabela: info["DEPENDENCIAS"] for tabela, info in tabelas.items()})
+
+    #Não adianta ter mais threads que conexões no pool
+    if paralelismo is None:
+        paralelismo = pool.max
+
+    relatorio = []
+    inicioTotal = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=paralelismo) as executor:
+        for numNivel, nivel in enumerate(niveis):
+            tarefas = {}
+            for tabela in nivel:
+                ddl = None
+                if criarEsquema:
+                    ddl = [tabelas[tabela]["DDL"]]
+                    if local:
+                        ddl = BaseLocal.TraduzCreateTable(ddl[0])
+
+                lotesTabela = lotes.get(tabela, [])
+                if ddl is None and len(lotesTabela) == 0:
+                    continue
+
+                tarefas[tabela] = executor.submit(CarregaTabela, pool, tabela, ddl, lotesTabela)
+
+            #Espera o nível inteiro antes de passar para o próximo
+            erros = []
+            for tabela, tarefa in tarefas.items():
+                try:
+                    linhas, idas, tempoCriacao, tempoInsercao = tarefa.result()
+                    relatorio.append([tabela, numNivel, linhas, idas, f"{tempoCriacao:.3f}", f"{tempoInsercao:.3f}"])
+                except Exception as e:
+                    erros.append(f"{tabela}: {e}")
+
+            if len(erros) > 0:
+                print("\nErro na carga, os níveis seguintes não foram carregados:")
+                for erro in erros:
+                    print("- " + erro)
+                print("")
+                return None
+
+    #Comandos finais, como a coleta de estatísticas
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            for comando in posCarga:
+                execucao = re.match(r"EXEC(?:UTE)?\s+(.*)$", comando, re.IGNORECASE | re.DOTALL)
+
+                if execucao is not None and local:
+                    #Equivalente ao DBMS_STATS no SQLite
+                    cursor.execute("ANALYZE")
+                elif execucao is not None:
+                    #EXEC é um comando do SQL*Plus, fora dele precisa de um bloco PL/SQL
+                    cursor.execute(f"BEGIN {execucao.group(1)}; END;")
+                else:
+                    cursor.execute(comando)
+            conn.commit()
+
+    tempoTotal = time.perf_counter() - inicioTotal
+
+    print(f"\n==== Carga concluída em {tempoTotal:.3f}s ({len(niveis)} níveis, até {paralelismo} conexões) ====")
+    print(tabulate(relatorio, headers=["Tabela", "Nível", "Linhas", "Idas ao banco", "Criação (s)", "Inserção (s)"], tablefmt="psql"))
+    print("")
+
+    return relatorio
+
+#Uso: python Carregador.py caminho_da_base.db
+#Cria e popula uma base local (SQLite), usada no lugar do Oracle para testes
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python Carregador.py caminho_da_base.db")
+        exit()
+
+    pool = BaseLocal.PoolLocal(sys.argv[1])
+    try:
+        CarregaBase(pool)
+    finally:
+        pool.close()
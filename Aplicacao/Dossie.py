@@ -0,0 +1,207 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Dossiê do paciente: tudo o que existe sobre um ou mais pacientes num número fixo de idas ao banco
+#Em vez de uma consulta por tabela por paciente (N+1), cada tabela é consultada uma única vez para todos os IDs
+#No Oracle, as consultas vão num único bloco PL/SQL que devolve os resultados implícitos (DBMS_SQL.RETURN_RESULT)
+
+from tabulate import tabulate
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+import BaseLocal
+import Carregador
+
+#Tamanho máximo da lista de IDs por ida ao banco (SYS.ODCIRAWLIST é um VARRAY de 32767 posições)
+TAMANHO_LOTE = 30000
+
+#Linhas buscadas por viagem ao ler os resultados
+TAMANHO_FETCH = 5000
+
+#Consultas do dossiê: (atributo do Dossie, SQL)
+#A primeira coluna é sempre o ID do paciente, usado para distribuir as linhas entre os dossiês
+#{filtro} é trocado pela condição sobre a lista de IDs
+CONSULTAS = [
+    ("paciente",
+     "SELECT P.ID AS PACIENTE, P.CPF, P.NOME, P.ESTADO, P.CIDADE, P.BAIRRO, P.RUA, P.NUMERO, P.TELEFONE1, P.TELEFONE2, "
+     "PA.SEXO, PA.NASCIMENTO, PA.OBITO, PA.COR, PA.PESO, PA.TELEFONE_EMERGENCIA1, PA.TELEFONE_EMERGENCIA2 "
+     "FROM PESSOA P JOIN PACIENTE PA ON PA.PESSOA = P.ID WHERE P.ID {filtro}"),
+    ("historico",
+     "SELECT PACIENTE, DATA_HORARIO, CID, DESCRICAO FROM HISTORICO_PACIENTE "
+     "WHERE PACIENTE {filtro} ORDER BY PACIENTE, DATA_HORARIO"),
+    ("exames",
+     "SELECT PACIENTE, ID, LABORATORIO, DATA_HORARIO, TIPO, MEDICO_SUPERVISOR, RESULTADO FROM EXAME "
+     "WHERE PACIENTE {filtro} ORDER BY PACIENTE, DATA_HORARIO"),
+    ("internacoes",
+     "SELECT PACIENTE, HOSPITAL, NUMERO, DATA_HORARIO_ENTRADA, DATA_HORARIO_ALTA FROM INTERNACAO "
+     "WHERE PACIENTE {filtro} ORDER BY PACIENTE, DATA_HORARIO_ENTRADA"),
+    ("cirurgias",
+     "SELECT PACIENTE, ID, HOSPITAL, NUMERO_SALA, DATA_HORARIO_INICIO, DATA_HORARIO_TERMINO, TIPO FROM CIRURGIA "
+     "WHERE PACIENTE {filtro} ORDER BY PACIENTE, DATA_HORARIO_INICIO"),
+    #Órgãos coletados do paciente ou recebidos por ele
+    ("orgaos",
+     "SELECT C.PACIENTE, O.TIPO, O.COLETA, O.LADO, O.RECEPCAO, O.TAMANHO, O.PESO, O.TIPO_SANGUINEO, O.RH, O.HLA "
+     "FROM ORGAO O JOIN CIRURGIA C ON C.ID = O.COLETA OR C.ID = O.RECEPCAO "
+     "WHERE C.PACIENTE {filtro} ORDER BY C.PACIENTE, C.ID"),
+    ("esperas",
+     "SELECT RECEPTOR AS PACIENTE, TIPO_ORGAO, PRIORIDADE FROM RECEPTOR_ESPERA "
+     "WHERE RECEPTOR {filtro} ORDER BY RECEPTOR, PRIORIDADE"),
+    ("doacoes",
+     "SELECT DOADOR AS PACIENTE, TIPO_ORGAO FROM DOADOR_DOA "
+     "WHERE DOADOR {filtro} ORDER BY DOADOR, TIPO_ORGAO"),
+]
+
+#Tudo o que se sabe de um paciente
+#paciente -> linha única com os dados de PESSOA e PACIENTE
+#Os demais atributos são listas de linhas (namedtuples com os nomes das colunas)
+class Dossie:
+    __slots__ = [atributo for atributo, _ in CONSULTAS]
+
+    def __init__(self):
+        self.paciente = None
+        for atributo, _ in CONSULTAS[1:]:
+            setattr(self, atributo, [])
+
+    #Órgãos de uma das cirurgias do paciente
+    def OrgaosDaCirurgia(self, idCirurgia):
+        return [orgao for orgao in self.orgaos if idCirurgia in (orgao.COLETA, orgao.RECEPCAO)]
+
+#======================================= BUSCA ======================================
+
+#Tipo de linha de uma consulta, criado uma vez por (atributo, colunas): criar um namedtuple é caro e as colunas não mudam entre lotes
+@lru_cache(maxsize=None)
+def TipoLinha(atributo, colunas):
+    return namedtuple("Linha" + atributo.capitalize(), colunas)
+
+#Distribui as linhas de um resultado entre os dossiês, pela primeira coluna
+def DistribuiLinhas(dossies, atributo, cursor, linhas):
+    Linha = TipoLinha(atributo, tuple(desc[0] for desc in cursor.description))
+
+    for linha in linhas:
+        linha = Linha(*linha)
+        dossie = dossies.get(BaseLocal.IdHex(linha.PACIENTE))
+        if dossie is None:
+            continue
+
+        if atributo == "paciente":
+            dossie.paciente = linha
+        else:
+            getattr(dossie, atributo).append(linha)
+
+#Oracle: um único bloco PL/SQL com todas as consultas, os IDs vão num único bind (coleção SYS.ODCIRAWLIST)
+def BuscaLoteOracle(conn, cursor, dossies, ids):
+    tipoLista = conn.gettype("SYS.ODCIRAWLIST")
+    lista = tipoLista.newobject([bytes.fromhex(idPessoa) for idPessoa in ids])
+
+    filtro = "IN (SELECT COLUMN_VALUE FROM TABLE(:ids))"
+    bloco = "DECLARE c SYS_REFCURSOR; BEGIN "
+    for _, sql in CONSULTAS:
+        bloco += f"OPEN c FOR {sql.format(filtro=filtro)}; DBMS_SQL.RETURN_RESULT(c); "
+    bloco += "END;"
+
+    cursor.execute(bloco, {"ids": lista})
+
+    for (atributo, _), resultado in zip(CONSULTAS, cursor.getimplicitresults()):
+        resultado.arraysize = TAMANHO_FETCH
+        DistribuiLinhas(dossies, atributo, resultado, resultado.fetchall())
+
+#Base local: uma consulta por tabela, os IDs vão numa lista IN
+#Binds anônimos ('?'), o SQLite fica lento com milhares de binds numerados
+def BuscaLoteLocal(conn, cursor, dossies, ids):
+    filtro = "IN (" + ", ".join("?" for _ in ids) + ")"
+
+    for atributo, sql in CONSULTAS:
+        cursor.execute(sql.format(filtro=filtro), ids)
+        DistribuiLinhas(dossies, atributo, cursor, cursor.fetchall())
+
+#Busca os dossiês de uma lista de IDs (hexadecimal ou bytes)
+#Retorna um dicionário ID hexadecimal -> Dossie; IDs que não são de pacientes ficam de fora
+def BuscaDossies(pool, ids):
+    ids = list(dict.fromkeys(BaseLocal.IdHex(idPessoa) for idPessoa in ids))
+    dossies = {idPessoa: Dossie() for idPessoa in ids}
+
+    busca = BuscaLoteLocal if BaseLocal.EhLocal(pool) else BuscaLoteOracle
+
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.arraysize = TAMANHO_FETCH
+            for i in range(0, len(ids), TAMANHO_LOTE):
+                busca(conn, cursor, dossies, ids[i:i + TAMANHO_LOTE])
+
+    return {idPessoa: dossie for idPessoa, dossie in dossies.items() if dossie.paciente is not None}
+
+#Forma ingênua (uma consulta por tabela por paciente), mantida apenas para comparação no benchmark
+def BuscaDossiesIngenuo(pool, ids):
+    ids = list(dict.fromkeys(BaseLocal.IdHex(idPessoa) for idPessoa in ids))
+    dossies = {idPessoa: Dossie() for idPessoa in ids}
+
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            for idPessoa in ids:
+                for atributo, sql in CONSULTAS:
+                    cursor.execute(sql.format(filtro="= :1"), [BaseLocal.BindId(pool, idPessoa)])
+                    DistribuiLinhas(dossies, atributo, cursor, cursor.fetchall())
+
+    return {idPessoa: dossie for idPessoa, dossie in dossies.items() if dossie.paciente is not None}
+
+#======================================= EXIBIÇÃO ======================================
+
+#Imprime uma seção do dossiê, sem a coluna do ID do paciente (repetida em todas as linhas)
+def ImprimeSecao(titulo, linhas):
+    print(f"\n---- {titulo} ----")
+    if len(linhas) == 0:
+        print("Nenhum registro")
+        return
+
+    print(tabulate([[BaseLocal.BinParaHex(v) for v in linha[1:]] for linha in linhas],
+                   headers=linhas[0]._fields[1:], tablefmt="psql"))
+
+def ImprimeDossie(idPessoa, dossie):
+    print(f"\n==== Dossiê do paciente {idPessoa} ====")
+    ImprimeSecao("Pessoa e paciente", [dossie.paciente])
+    ImprimeSecao("Histórico", dossie.historico)
+    ImprimeSecao("Exames", dossie.exames)
+    ImprimeSecao("Internações", dossie.internacoes)
+    ImprimeSecao("Cirurgias", dossie.cirurgias)
+    ImprimeSecao("Órgãos coletados/recebidos", dossie.orgaos)
+    ImprimeSecao("Espera por órgãos", dossie.esperas)
+    ImprimeSecao("Doações autorizadas", dossie.doacoes)
+
+#======================================= BENCHMARK ======================================
+
+#Compara a busca em lote com a ingênua, em idas ao banco e tempo, para lotes de pacientes de vários tamanhos
+#latencia -> atraso simulado por ida ao banco (segundos); a forma ingênua só roda até limiteIngenuo pacientes
+def Benchmark(tamanhos=(1, 100, 10000), latencia=0.001, limiteIngenuo=100):
+    pool = BaseLocal.PoolLocal()
+    try:
+        Carregador.CarregaBase(pool)
+        ids = BaseLocal.InserePacientesSinteticos(pool, max(tamanhos))
+        medido = BaseLocal.PoolMedido(pool, latencia)
+
+        relatorio = []
+        for tamanho in tamanhos:
+            formas = [("Lote", BuscaDossies)]
+            if tamanho <= limiteIngenuo:
+                formas.append(("Ingênua (N+1)", BuscaDossiesIngenuo))
+
+            for nome, busca in formas:
+                medido.idas = 0
+                inicio = time.perf_counter()
+                dossies = busca(medido, ids[:tamanho])
+                tempo = time.perf_counter() - inicio
+
+                relatorio.append([tamanho, nome, len(dossies), medido.idas, f"{tempo * 1000:.1f}"])
+
+        print(f"\n==== Benchmark do dossiê (latência simulada de {latencia * 1000:.1f}ms por ida) ====")
+        print(tabulate(relatorio, headers=["Pacientes", "Forma", "Dossiês", "Idas ao banco", "Tempo (ms)"], tablefmt="psql"))
+    finally:
+        pool.close()
+
+#Uso: python Dossie.py
+#Roda o benchmark numa base local temporária
+if __name__ == "__main__":
+    Benchmark()
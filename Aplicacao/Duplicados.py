@@ -0,0 +1,511 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Detecção de pessoas possivelmente duplicadas em PESSOA (mesma pessoa com CPF, nome ou telefone digitados diferente)
+#Comparar todos os pares é quadrático, então cada pessoa é colocada, numa única passada, em blocos por chaves simples:
+#código fonético do nome, final dos telefones, rua + número + cidade e cada metade do CPF
+#Só pessoas de um mesmo bloco são comparadas; blocos grandes demais (nomes muito comuns) são comparados por
+#vizinhança ordenada, então o número de comparações cresce linearmente com o número de pessoas
+#Os pares com pontuação acima do limiar são unidos em grupos (clusters)
+
+from tabulate import tabulate
+from collections import namedtuple, defaultdict
+from functools import lru_cache
+import operator
+import random
+import re
+import sys
+import time
+import unicodedata
+
+import BaseLocal
+
+#Pesos da pontuação de um par; só entram os campos preenchidos nas duas pessoas (nome e CPF sempre estão)
+#O telefone só conta quando é o mesmo: trocar de telefone é comum, então telefones diferentes não afastam o par
+PESO_NOME = 0.35
+PESO_CPF = 0.25
+PESO_TELEFONE = 0.15
+PESO_ENDERECO = 0.25
+
+#Pontuação mínima para considerar um par como a mesma pessoa
+LIMIAR = 0.85
+
+#Blocos maiores que isso não são comparados todos contra todos: cada pessoa só é comparada
+#com as JANELA seguintes na ordem de nome e CPF
+MAIOR_BLOCO = 50
+JANELA = 10
+
+#Dígitos do final do telefone usados como chave (o DDD costuma ser digitado errado ou omitido)
+DIGITOS_TELEFONE = 8
+
+#Pessoa já normalizada para a comparação
+#TELEFONES -> finais dos telefones; ENDERECO -> (rua, número, cidade) ou None se incompleto
+Registro = namedtuple("Registro", ["ID", "CPF", "NOME", "TELEFONES", "ENDERECO", "CIDADE", "ESTADO"])
+
+#======================================= NORMALIZAÇÃO ======================================
+
+#Maiúsculas, sem acentos nem pontuação e com um único espaço entre as palavras
+def Normaliza(texto):
+    if texto is None:
+        return ""
+
+    texto = texto.upper()
+    if not texto.isascii():
+        texto = unicodedata.normalize("NFKD", texto.replace("Ç", "S"))
+        texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^A-Z0-9 ]", " ", texto).split())
+
+def Digitos(texto):
+    return "" if texto is None else re.sub(r"\D", "", texto)
+
+#Trocas para que grafias com o mesmo som no português fiquem iguais (ordem importa)
+REGRAS_FONETICAS = [
+    (r"PH", "F"), (r"LH", "L"), (r"NH", "N"), (r"[CS]H", "X"), (r"SC(?=[EI])", "S"), (r"SS", "S"),
+    (r"QU(?=[EI])", "K"), (r"GU(?=[EI])", "G"), (r"C(?=[EI])", "S"), (r"G(?=[EI])", "J"), (r"[CQ]", "K"),
+    (r"Z", "S"), (r"W", "V"), (r"Y", "I"), (r"H", ""), (r"M$", "N"),
+]
+REGRAS_FONETICAS = [(re.compile(padrao), troca) for padrao, troca in REGRAS_FONETICAS]
+
+#Código fonético de uma palavra já normalizada: aplica as regras, mantém a primeira letra,
+#tira as vogais do resto e junta letras repetidas. Ex.: 'THIAGO' e 'TIAGO' -> 'TG', 'LUIZ' e 'LUIS' -> 'LS'
+#Os nomes se repetem muito, então os códigos ficam guardados
+@lru_cache(maxsize=100000)
+def CodigoFonetico(palavra):
+    for padrao, troca in REGRAS_FONETICAS:
+        palavra = padrao.sub(troca, palavra)
+
+    if palavra == "":
+        return ""
+
+    codigo = palavra[0]
+    for letra in palavra[1:]:
+        if letra not in "AEIOU" and letra != codigo[-1]:
+            codigo += letra
+
+    return codigo
+
+#Linha de PESSOA (ID, CPF, NOME, ESTADO, CIDADE, BAIRRO, RUA, NUMERO, TELEFONE1, TELEFONE2) -> Registro
+def PreparaPessoa(linha):
+    idPessoa, cpf, nome, estado, cidade, _, rua, numero, telefone1, telefone2 = linha
+
+    telefones = tuple(sorted({Digitos(tel)[-DIGITOS_TELEFONE:] for tel in (telefone1, telefone2)
+                              if len(Digitos(tel)) >= DIGITOS_TELEFONE}))
+    cidade = Normaliza(cidade)
+    rua = Normaliza(rua)
+    endereco = (rua, numero, cidade) if rua != "" and numero is not None and cidade != "" else None
+
+    return Registro(BaseLocal.IdHex(idPessoa), Digitos(cpf), Normaliza(nome), telefones, endereco, cidade, estado)
+
+#Chaves de bloco de uma pessoa; o prefixo separa os tipos de chave
+def ChavesBloco(registro):
+    palavras = registro.NOME.split()
+    if len(palavras) > 0:
+        #Primeiro e último nome, onde os erros de grafia costumam mudar pouco o som
+        yield ("N", CodigoFonetico(palavras[0]), CodigoFonetico(palavras[-1]))
+
+    for telefone in registro.TELEFONES:
+        yield ("T", telefone)
+
+    if registro.ENDERECO is not None:
+        yield ("E",) + registro.ENDERECO
+
+    #Um erro de digitação no CPF deixa uma das metades intacta
+    if len(registro.CPF) == 11:
+        yield ("C1", registro.CPF[:6])
+        yield ("C2", registro.CPF[6:])
+
+#======================================= SIMILARIDADE ======================================
+
+#Similaridade de Jaro-Winkler entre duas strings (1 = iguais, 0 = nada em comum)
+def JaroWinkler(a, b):
+    if a == b:
+        return 1.0
+    if len(a) == 0 or len(b) == 0:
+        return 0.0
+
+    alcance = max(0, max(len(a), len(b)) // 2 - 1)
+    usadosB = [False] * len(b)
+    comunsA = []
+    for i, letra in enumerate(a):
+        for j in range(max(0, i - alcance), min(len(b), i + alcance + 1)):
+            if not usadosB[j] and b[j] == letra:
+                usadosB[j] = True
+                comunsA.append(letra)
+                break
+
+    comuns = len(comunsA)
+    if comuns == 0:
+        return 0.0
+
+    comunsB = [letra for letra, usado in zip(b, usadosB) if usado]
+    transposicoes = sum(x != y for x, y in zip(comunsA, comunsB)) / 2
+    jaro = (comuns / len(a) + comuns / len(b) + (comuns - transposicoes) / comuns) / 3
+
+    prefixo = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefixo += 1
+
+    return jaro + prefixo * 0.1 * (1 - jaro)
+
+#Fração dos dígitos do CPF iguais na mesma posição; dois dígitos vizinhos trocados contam como um erro só
+def SimilaridadeCPF(a, b):
+    if len(a) != len(b) or len(a) == 0:
+        return 0.0
+
+    erros = sum(map(operator.ne, a, b))
+    if erros == 2:
+        i, j = [k for k, (x, y) in enumerate(zip(a, b)) if x != y]
+        if j == i + 1 and a[i] == b[j] and a[j] == b[i]:
+            erros = 1
+
+    return 1 - erros / len(a)
+
+#Pontuação (0 a 1) de duas pessoas serem a mesma: média ponderada das similaridades dos campos preenchidos nas duas
+#Os campos baratos vêm primeiro; as comparações de texto (rua e nome) só são feitas se, supondo que sejam
+#idênticos, o par ainda puder chegar ao limiar. Abaixo do limiar a pontuação devolvida é esse teto
+def Pontuacao(a, b):
+    soma = PESO_CPF * SimilaridadeCPF(a.CPF, b.CPF)
+    pesos = PESO_NOME + PESO_CPF
+
+    if not set(a.TELEFONES).isdisjoint(b.TELEFONES):
+        soma += PESO_TELEFONE
+        pesos += PESO_TELEFONE
+
+    rua = 0.0
+    if a.ENDERECO is not None and b.ENDERECO is not None:
+        ruaA, numeroA, cidadeA = a.ENDERECO
+        ruaB, numeroB, cidadeB = b.ENDERECO
+        soma += PESO_ENDERECO * ((numeroA == numeroB) + (cidadeA == cidadeB)) / 3
+        pesos += PESO_ENDERECO
+        rua = PESO_ENDERECO / 3
+
+        if (soma + rua + PESO_NOME) / pesos < LIMIAR:
+            return (soma + rua + PESO_NOME) / pesos
+        rua *= JaroWinkler(ruaA, ruaB)
+
+    soma += rua
+    if (soma + PESO_NOME) / pesos < LIMIAR:
+        return (soma + PESO_NOME) / pesos
+
+    return (soma + PESO_NOME * JaroWinkler(a.NOME, b.NOME)) / pesos
+
+#======================================= DETECÇÃO ======================================
+
+#Pares de posições a comparar dentro de um bloco: todos, ou só os vizinhos próximos se o bloco for grande
+def ParesBloco(registros, membros):
+    if len(membros) <= MAIOR_BLOCO:
+        for i in range(len(membros)):
+            for j in range(i + 1, len(membros)):
+                yield membros[i], membros[j]
+        return
+
+    membros = sorted(membros, key=lambda k: (registros[k].NOME, registros[k].CPF))
+    for i in range(len(membros)):
+        for j in range(i + 1, min(len(membros), i + JANELA + 1)):
+            yield membros[i], membros[j]
+
+#Primeiro bloco pequeno (comparado todos contra todos) que as duas pessoas têm em comum, na ordem de ChavesBloco
+#Retorna None se só dividem blocos grandes; um bloco em comum tem ao menos duas pessoas, então já é uma lista
+def PrimeiroBlocoPequeno(blocos, blocosI, blocosJ):
+    for bloco in blocosI:
+        if bloco in blocosJ and len(blocos[bloco]) <= MAIOR_BLOCO:
+            return bloco
+    return None
+
+#Grupos de pessoas possivelmente duplicadas a partir de linhas de PESSOA (qualquer iterável, lido uma única vez)
+#Retorna (grupos, estatisticas); cada grupo é (menor pontuação entre os pares que o uniram, [registros])
+def DetectaDuplicados(linhas):
+    #Passada única: normaliza e indexa por bloco
+    #Cada bloco vira um número, e cada pessoa guarda os números dos seus blocos na ordem de ChavesBloco
+    registros = []
+    blocosRegistro = []
+    indiceBloco = {}
+    blocos = []
+    for linha in linhas:
+        registro = PreparaPessoa(linha)
+        #Um único objeto int por pessoa, compartilhado por todos os blocos em que ela entra
+        k = len(registros)
+        meus = []
+        for chave in ChavesBloco(registro):
+            #Guarda só o hash da chave, não a tupla e suas strings, para economizar memória
+            #Uma colisão (rara com hash de 64 bits) junta dois blocos; se a soma passar de MAIOR_BLOCO, o bloco deixa de ser
+            #comparado todos contra todos e passa à janela, e um par que só tinha aquele bloco em comum pode não ser comparado
+            chave = hash(chave)
+            bloco = indiceBloco.get(chave)
+            if bloco is None:
+                #Enquanto tem uma pessoa só, o bloco guarda apenas o índice dela; a maioria (telefone, CPF, endereço) fica assim
+                bloco = indiceBloco[chave] = len(blocos)
+                blocos.append(k)
+            elif isinstance(blocos[bloco], int):
+                blocos[bloco] = [blocos[bloco], k]
+            else:
+                blocos[bloco].append(k)
+            meus.append(bloco)
+        registros.append(registro)
+        blocosRegistro.append(tuple(meus))
+    #As chaves só servem para montar os blocos
+    del indiceBloco
+
+    #Union-find das pessoas ligadas por algum par acima do limiar
+    pai = list(range(len(registros)))
+
+    def Raiz(k):
+        while pai[k] != k:
+            pai[k] = pai[pai[k]]
+            k = pai[k]
+        return k
+
+    comparacoes = 0
+    pontuacoes = {}
+    for bloco, membros in enumerate(blocos):
+        if isinstance(membros, int):
+            continue
+        pequeno = len(membros) <= MAIOR_BLOCO
+
+        for i, j in ParesBloco(registros, membros):
+            if i > j:
+                i, j = j, i
+            #A mesma dupla pode estar em vários blocos (mesmo nome e mesmo telefone, por exemplo)
+            #Sem guardar os pares já vistos: a dupla é comparada só no primeiro bloco pequeno que as duas têm em comum,
+            #onde certamente aparece; se só dividem blocos grandes, é comparada em cada um que a traga pela janela
+            dono = PrimeiroBlocoPequeno(blocos, blocosRegistro[i], blocosRegistro[j])
+            if dono != (bloco if pequeno else None):
+                continue
+            comparacoes += 1
+
+            pontuacao = Pontuacao(registros[i], registros[j])
+            if pontuacao >= LIMIAR:
+                pontuacoes[(i, j)] = pontuacao
+                pai[Raiz(i)] = Raiz(j)
+
+    raizes = {Raiz(i) for i, _ in pontuacoes}
+    membrosGrupo = defaultdict(list)
+    for k in range(len(registros)):
+        raiz = Raiz(k)
+        if raiz in raizes:
+            membrosGrupo[raiz].append(k)
+
+    menorPontuacao = {}
+    for (i, _), pontuacao in pontuacoes.items():
+        raiz = Raiz(i)
+        menorPontuacao[raiz] = min(menorPontuacao.get(raiz, 1.0), pontuacao)
+
+    grupos = sorted(((menorPontuacao[raiz], [registros[k] for k in membros]) for raiz, membros in membrosGrupo.items()),
+                    key=lambda grupo: -grupo[0])
+
+    estatisticas = {"pessoas": len(registros), "blocos": len(blocos), "comparacoes": comparacoes}
+    return grupos, estatisticas
+
+#======================================= BANCO ======================================
+
+SQL_PESSOAS = "SELECT ID, CPF, NOME, ESTADO, CIDADE, BAIRRO, RUA, NUMERO, TELEFONE1, TELEFONE2 FROM PESSOA"
+
+#Linhas trazidas por viagem ao banco
+TAMANHO_FETCH = 5000
+
+#Lê PESSOA aos poucos, sem montar a tabela inteira em memória antes da indexação
+def LePessoas(pool):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.arraysize = TAMANHO_FETCH
+            cursor.execute(SQL_PESSOAS)
+
+            while True:
+                linhas = cursor.fetchmany(TAMANHO_FETCH)
+                if len(linhas) == 0:
+                    break
+                yield from linhas
+
+def ImprimeGrupos(grupos, estatisticas):
+    print("\n==== Pessoas possivelmente duplicadas ====")
+    print(f"{estatisticas['pessoas']} pessoas, {estatisticas['blocos']} blocos, {estatisticas['comparacoes']} comparações")
+
+    if len(grupos) == 0:
+        print("Nenhum grupo encontrado!")
+    else:
+        print(tabulate([[numero, f"{pontuacao:.2f}", registro.ID, registro.CPF, registro.NOME, registro.ESTADO, registro.CIDADE,
+                         ", ".join(registro.TELEFONES)]
+                        for numero, (pontuacao, registros) in enumerate(grupos, 1) for registro in registros],
+                       headers=["Grupo", "Pontuação", "ID", "CPF", "Nome", "Estado", "Cidade", "Telefones (final)"],
+                       tablefmt="psql"))
+
+    #Print de separação, para facilitar a legibilidade
+    print("")
+
+#======================================= AVALIAÇÃO ======================================
+
+NOMES = ["ANA", "BRUNO", "CARLA", "DIEGO", "ELISA", "FABIO", "GABRIELA", "HUGO", "ISABEL", "JOAO", "LARISSA", "MARCOS",
+         "THIAGO", "LUIS", "FELIPE", "RAFAEL", "BEATRIZ", "CAMILA", "JULIANA", "MARIANA", "PEDRO", "LUCAS", "GUSTAVO",
+         "MATEUS", "VINICIUS", "LEONARDO", "FERNANDA", "PATRICIA", "RENATA", "SERGIO", "CECILIA", "HELENA", "MANOEL",
+         "DANIEL", "LETICIA", "VITORIA", "RODRIGO", "EDUARDO", "ANDRE", "CLAUDIA"]
+SOBRENOMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "PEREIRA", "COSTA", "RODRIGUES", "ALMEIDA", "LIMA", "GOMES",
+              "RIBEIRO", "CARVALHO", "FERREIRA", "ARAUJO", "MARTINS", "ROCHA", "BARBOSA", "MELO", "CARDOSO", "TEIXEIRA",
+              "CORREIA", "DIAS", "NASCIMENTO", "MOREIRA", "CAVALCANTI", "MONTEIRO", "MENDES", "FREITAS", "BATISTA", "VIEIRA"]
+CIDADES = ["SAO PAULO", "CAMPINAS", "SAO CARLOS", "RIO DE JANEIRO", "NITEROI", "BELO HORIZONTE", "PORTO ALEGRE", "CURITIBA"]
+RUAS = ["RUA DAS FLORES", "AVENIDA BRASIL", "RUA XV DE NOVEMBRO", "RUA SETE", "RUA SAO JOSE", "AVENIDA PAULISTA",
+        "RUA DA PAZ", "RUA DOM PEDRO II", "RUA TIRADENTES", "RUA SANTA CRUZ"]
+
+#Grafias diferentes com o mesmo som, trocadas ao gerar um duplicado
+VARIANTES_GRAFIA = [("TH", "T"), ("Z", "S"), ("S", "Z"), ("Y", "I"), ("PH", "F"), ("SS", "S"), ("LL", "L"), ("OU", "O")]
+
+def GeraCPF(gerador):
+    numeros = f"{gerador.randrange(10 ** 11):011d}"
+    return f"{numeros[:3]}.{numeros[3:6]}.{numeros[6:9]}-{numeros[9:]}"
+
+def GeraTelefone(gerador):
+    return f"({gerador.randint(11, 99)})9{gerador.randint(0, 9999):04d}-{gerador.randint(0, 9999):04d}"
+
+#Um erro de digitação: troca, apaga, duplica ou inverte um caractere (só letras ou só dígitos)
+def ErroDigitacao(gerador, texto, alfabeto):
+    posicoes = [i for i, c in enumerate(texto) if c in alfabeto]
+    if len(posicoes) < 2:
+        return texto
+
+    i = gerador.choice(posicoes[:-1])
+    erro = gerador.choice(["troca", "apaga", "duplica", "inverte"] if alfabeto.isalpha() else ["troca", "inverte"])
+    match erro:
+        case "troca":
+            return texto[:i] + gerador.choice(alfabeto) + texto[i + 1:]
+        case "apaga":
+            return texto[:i] + texto[i + 1:]
+        case "duplica":
+            return texto[:i] + texto[i] + texto[i:]
+        case "inverte":
+            j = next(p for p in posicoes if p > i)
+            return texto[:i] + texto[j] + texto[i + 1:j] + texto[i] + texto[j + 1:]
+
+#Cópia da pessoa como um atendente poderia ter digitado de novo: CPF, nome, telefones e endereço com erros
+def GeraDuplicado(gerador, pessoa, i):
+    idPessoa, cpf, nome, estado, cidade, bairro, rua, numero, telefone1, telefone2 = pessoa
+
+    if gerador.random() < 0.6:
+        cpf = ErroDigitacao(gerador, cpf, "0123456789")
+    if gerador.random() < 0.6:
+        if gerador.random() < 0.5:
+            nome = ErroDigitacao(gerador, nome, "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        else:
+            antigo, novo = gerador.choice([v for v in VARIANTES_GRAFIA if v[0] in nome] or [("", "")])
+            nome = nome.replace(antigo, novo, 1) if antigo != "" else nome
+    if gerador.random() < 0.2:
+        #Sem o nome do meio ou com acento
+        partes = nome.split()
+        nome = " ".join(partes[:1] + partes[2:]) if len(partes) > 2 else nome.replace("A", "Á", 1)
+    if gerador.random() < 0.3:
+        telefone1, telefone2 = (GeraTelefone(gerador) if gerador.random() < 0.5 else None), None
+    if gerador.random() < 0.3:
+        estado, cidade, bairro, rua, numero = None, None, None, None, None
+    elif rua is not None and gerador.random() < 0.2:
+        rua = ErroDigitacao(gerador, rua, "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+    return (f"D{i:015X}", cpf, nome, estado, cidade, bairro, rua, numero, telefone1, telefone2)
+
+#Pessoas aleatórias com duplicados injetados
+#Também gera famílias (mesmo endereço, telefone e sobrenome) e homônimos, que não podem ser apontados como duplicados
+#Retorna as linhas (em ordem aleatória) e o conjunto de pares de IDs que são a mesma pessoa
+def GeraPessoas(gerador, quantidade, taxaDuplicados=0.1):
+    pessoas = []
+    for i in range(quantidade):
+        if len(pessoas) > 0 and gerador.random() < 0.15:
+            #Parente de alguém já gerado: mora junto e tem o mesmo último sobrenome
+            parente = gerador.choice(pessoas)
+            nome = f"{gerador.choice(NOMES)} {parente[2].split()[-1]}"
+            pessoas.append((f"{i:016X}", GeraCPF(gerador), nome) + parente[3:8] + (parente[8], GeraTelefone(gerador)))
+            continue
+
+        nome = " ".join([gerador.choice(NOMES)] + gerador.sample(SOBRENOMES, gerador.choice([1, 2, 2])))
+        if gerador.random() < 0.7:
+            endereco = ("SP", gerador.choice(CIDADES), "CENTRO", gerador.choice(RUAS), gerador.randint(1, 9999))
+        else:
+            endereco = (None, None, None, None, None)
+        telefone1 = GeraTelefone(gerador) if gerador.random() < 0.8 else None
+        telefone2 = GeraTelefone(gerador) if telefone1 is not None and gerador.random() < 0.3 else None
+        pessoas.append((f"{i:016X}", GeraCPF(gerador), nome) + endereco + (telefone1, telefone2))
+
+    pares = set()
+    duplicados = []
+    for i, pessoa in enumerate(gerador.sample(pessoas, int(quantidade * taxaDuplicados))):
+        duplicado = GeraDuplicado(gerador, pessoa, i)
+        duplicados.append(duplicado)
+        pares.add(frozenset((pessoa[0], duplicado[0])))
+
+    linhas = pessoas + duplicados
+    gerador.shuffle(linhas)
+    return linhas, pares
+
+#Recall e precisão por par: todo par dentro de um mesmo grupo conta como apontado
+def Avalia(grupos, pares):
+    apontados = {frozenset((a.ID, b.ID)) for _, registros in grupos for k, a in enumerate(registros) for b in registros[k + 1:]}
+    acertos = len(apontados & pares)
+
+    recall = acertos / len(pares) if len(pares) > 0 else 1.0
+    precisao = acertos / len(apontados) if len(apontados) > 0 else 1.0
+    return recall, precisao
+
+#Pico de memória do processo (MB) até agora, sem dependências extras: psapi no Windows, resource nos demais
+def PicoMemoria():
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Contadores(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        contadores = Contadores()
+        contadores.cb = ctypes.sizeof(contadores)
+        ctypes.windll.kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        ctypes.windll.psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(Contadores), wintypes.DWORD]
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(contadores), contadores.cb)
+        return contadores.PeakWorkingSetSize / 2**20
+
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #ru_maxrss vem em bytes no macOS e em KB no Linux
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+#Mede recall, precisão, comparações, tempo e memória em bases geradas de tamanhos crescentes
+#O pico de memória é o do processo, então inclui a base gerada; como os tamanhos crescem, cada linha mostra o pico daquele tamanho
+#Por padrão só os tamanhos pequenos (segundos); os grandes (1 milhão leva ~100s e ~1,6GB) são pedidos pela linha de comando
+def Avaliacao(tamanhos=(10000, 100000), semente=0):
+    gerador = random.Random(semente)
+    relatorio = []
+
+    for quantidade in tamanhos:
+        linhas, pares = GeraPessoas(gerador, quantidade)
+
+        inicio = time.perf_counter()
+        grupos, estatisticas = DetectaDuplicados(linhas)
+        tempo = time.perf_counter() - inicio
+
+        recall, precisao = Avalia(grupos, pares)
+        pessoas = estatisticas["pessoas"]
+        relatorio.append([pessoas, len(pares), len(grupos), estatisticas["comparacoes"],
+                          f"{estatisticas['comparacoes'] / pessoas:.1f}", f"{pessoas * (pessoas - 1) // 2:.1e}",
+                          f"{recall:.4f}", f"{precisao:.4f}", f"{tempo:.2f}", f"{PicoMemoria():.0f}"])
+        #Libera a base antes de gerar a próxima, para ela não somar no pico do tamanho seguinte
+        del linhas, pares, grupos
+
+    print("\n==== Avaliação da detecção de duplicados (dados gerados) ====")
+    print(tabulate(relatorio, headers=["Pessoas", "Duplicados", "Grupos", "Comparações", "Comparações/pessoa",
+                                       "Todos os pares", "Recall", "Precisão", "Tempo (s)", "Pico de memória (MB)"],
+                   tablefmt="psql"))
+
+#Uso: python Duplicados.py [quantidade de pessoas ...]
+#Ex.: python Duplicados.py 300000 1000000
+if __name__ == "__main__":
+    if not all(argumento.isdigit() for argumento in sys.argv[1:]):
+        print("Uso: python Duplicados.py [quantidade de pessoas ...]")
+        exit()
+
+    if len(sys.argv) > 1:
+        Avaliacao(tuple(int(argumento) for argumento in sys.argv[1:]))
+    else:
+        Avaliacao()
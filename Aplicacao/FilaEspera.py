@@ -0,0 +1,586 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Fila de espera por órgão (RECEPTOR_ESPERA) mantida em memória
+#É carregada uma vez e depois atualizada a cada alteração, sem recarregar a tabela
+#Cada tipo de órgão tem um heap indexado por grupo sanguíneo, então topo, extração, alteração de prioridade
+#e remoção custam O(log n), e os próximos N compatíveis com um órgão custam O(N log N), independente do tamanho da fila
+
+from tabulate import tabulate
+from datetime import datetime
+import heapq
+import re
+import random
+import time
+
+import BaseLocal
+import Carregador
+
+#Grupos sanguíneos do receptor que podem receber de cada grupo do doador (mesma regra de SQL/selects.sql)
+#O -> todos, A -> A e AB, B -> B e AB, AB -> AB
+RECEPTORES_COMPATIVEIS = {
+    "O": {"O", "A", "B", "AB"},
+    "A": {"A", "AB"},
+    "B": {"B", "AB"},
+    "AB": {"AB"},
+}
+
+#Grupo dos receptores sem exame de tipo sanguíneo, não são compatíveis com nenhum órgão
+SEM_TIPAGEM = None
+
+#Um exame é de tipagem sanguínea quando o resultado começa com este prefixo
+#A mesma regra vale nas consultas (LIKE 'TIPO SANGUINEO%'), na leitura do tipo e na importação dos exames
+PREFIXO_TIPAGEM = "TIPO SANGUINEO"
+
+def EhTipagem(resultado):
+    return resultado is not None and resultado.startswith(PREFIXO_TIPAGEM)
+
+#Extrai o tipo sanguíneo do resultado de um exame, ex.: 'TIPO SANGUINEO AB-, HLA-C*321' -> 'AB-'
+#Retorna None se o exame não for de tipagem ou se o tipo não puder ser lido
+def TipoSanguineoExame(resultado):
+    if not EhTipagem(resultado):
+        return None
+
+    tipagem = re.match(PREFIXO_TIPAGEM + r" (AB|A|B|O)([+-])", resultado)
+    return None if tipagem is None else tipagem.group(1) + tipagem.group(2)
+
+#Verifica se um receptor do grupo sanguíneo informado (ex.: 'A+') pode receber um órgão do tipo e Rh do doador
+#Rh: receptor negativo não pode receber de doador positivo
+def Compativel(sangueReceptor, tipoSanguineoDoador, rhDoador):
+    if sangueReceptor is None:
+        return False
+
+    tipoReceptor, rhReceptor = sangueReceptor[:-1], sangueReceptor[-1]
+    return tipoReceptor in RECEPTORES_COMPATIVEIS[tipoSanguineoDoador] and not (rhReceptor == "-" and rhDoador == "+")
+
+#======================================= HEAP INDEXADO ======================================
+
+#Min-heap binário que guarda a posição de cada item, permitindo alterar ou remover qualquer item em O(log n)
+class HeapIndexado:
+    def __init__(self):
+        #Cada posição guarda [chave, item]
+        self.nos = []
+        #item -> posição em self.nos
+        self.posicoes = {}
+
+    def __len__(self):
+        return len(self.nos)
+
+    def __contains__(self, item):
+        return item in self.posicoes
+
+    #Retorna (chave, item) do menor, sem remover
+    def Topo(self):
+        return None if len(self.nos) == 0 else tuple(self.nos[0])
+
+    def Chave(self, item):
+        return self.nos[self.posicoes[item]][0]
+
+    def Insere(self, item, chave):
+        if item in self.posicoes:
+            raise KeyError(f"{item} já está no heap")
+
+        self.nos.append([chave, item])
+        self.posicoes[item] = len(self.nos) - 1
+        self.Sobe(len(self.nos) - 1)
+
+    #Remove um item qualquer, retornando a sua chave
+    def Remove(self, item):
+        i = self.posicoes.pop(item)
+        chave = self.nos[i][0]
+        ultimo = self.nos.pop()
+
+        #Se o removido não era o último, o último ocupa o seu lugar e é reposicionado
+        if i < len(self.nos):
+            self.nos[i] = ultimo
+            self.posicoes[ultimo[1]] = i
+            self.Sobe(i)
+            self.Desce(self.posicoes[ultimo[1]])
+
+        return chave
+
+    #Remove e retorna (chave, item) do menor
+    def Extrai(self):
+        if len(self.nos) == 0:
+            return None
+
+        chave, item = self.nos[0]
+        self.Remove(item)
+        return chave, item
+
+    def Atualiza(self, item, chave):
+        i = self.posicoes[item]
+        self.nos[i][0] = chave
+        self.Sobe(i)
+        self.Desce(self.posicoes[item])
+
+    def Troca(self, i, j):
+        self.nos[i], self.nos[j] = self.nos[j], self.nos[i]
+        self.posicoes[self.nos[i][1]] = i
+        self.posicoes[self.nos[j][1]] = j
+
+    def Sobe(self, i):
+        while i > 0:
+            pai = (i - 1) // 2
+            if self.nos[i][0] >= self.nos[pai][0]:
+                break
+            self.Troca(i, pai)
+            i = pai
+
+    def Desce(self, i):
+        while True:
+            menor = i
+            for filho in (2 * i + 1, 2 * i + 2):
+                if filho < len(self.nos) and self.nos[filho][0] < self.nos[menor][0]:
+                    menor = filho
+
+            if menor == i:
+                break
+            self.Troca(i, menor)
+            i = menor
+
+    #Verifica a propriedade do heap e o índice de posições, usado na verificação de consistência
+    def Valido(self):
+        for i, (chave, item) in enumerate(self.nos):
+            if self.posicoes.get(item) != i:
+                return False
+            if i > 0 and self.nos[(i - 1) // 2][0] > chave:
+                return False
+
+        return len(self.posicoes) == len(self.nos)
+
+#Retorna os n menores (chave, item) de vários heaps juntos, sem alterá-los
+#Percorre as árvores a partir das raízes com um heap auxiliar: O(n log n), sem depender do tamanho dos heaps
+def Menores(heaps, n):
+    fronteira = [(heap.nos[0][0], h, 0) for h, heap in enumerate(heaps) if len(heap) > 0]
+    heapq.heapify(fronteira)
+
+    resultado = []
+    while len(fronteira) > 0 and len(resultado) < n:
+        chave, h, i = heapq.heappop(fronteira)
+        nos = heaps[h].nos
+        resultado.append((chave, nos[i][1]))
+
+        for filho in (2 * i + 1, 2 * i + 2):
+            if filho < len(nos):
+                heapq.heappush(fronteira, (nos[filho][0], h, filho))
+
+    return resultado
+
+#======================================= FILAS ======================================
+
+#Filas de espera de todos os tipos de órgão
+#Receptores são identificados pelo ID em hexadecimal; quanto menor a PRIORIDADE, antes na fila (1 é a máxima)
+#Empates são desfeitos pelo ID, para a ordem ser sempre a mesma
+class FilasEspera:
+    def __init__(self):
+        #tipo de órgão -> {grupo sanguíneo -> HeapIndexado}
+        self.filas = {}
+        #receptor -> grupo sanguíneo ('O+', 'AB-', ... ou SEM_TIPAGEM)
+        self.sangue = {}
+        #receptor -> tipos de órgão que ele espera
+        self.esperas = {}
+
+    def Heap(self, tipoOrgao, grupo):
+        return self.filas.setdefault(tipoOrgao, {}).setdefault(grupo, HeapIndexado())
+
+    def Tamanho(self, tipoOrgao=None):
+        if tipoOrgao is not None:
+            return sum(len(heap) for heap in self.filas.get(tipoOrgao, {}).values())
+
+        return sum(len(tipos) for tipos in self.esperas.values())
+
+    def Prioridade(self, receptor, tipoOrgao):
+        if tipoOrgao not in self.esperas.get(receptor, set()):
+            return None
+
+        return self.Heap(tipoOrgao, self.sangue.get(receptor, SEM_TIPAGEM)).Chave(receptor)[0]
+
+    def Adiciona(self, receptor, tipoOrgao, prioridade):
+        self.Heap(tipoOrgao, self.sangue.get(receptor, SEM_TIPAGEM)).Insere(receptor, (prioridade, receptor))
+        self.esperas.setdefault(receptor, set()).add(tipoOrgao)
+
+    #Remove o receptor da fila de um órgão (ex.: transplante realizado)
+    def Remove(self, receptor, tipoOrgao):
+        self.Heap(tipoOrgao, self.sangue.get(receptor, SEM_TIPAGEM)).Remove(receptor)
+        self.esperas[receptor].discard(tipoOrgao)
+
+        if len(self.esperas[receptor]) == 0:
+            del self.esperas[receptor]
+
+    #Remove o receptor de todas as filas (ex.: óbito)
+    def RemoveReceptor(self, receptor):
+        for tipoOrgao in list(self.esperas.get(receptor, set())):
+            self.Remove(receptor, tipoOrgao)
+
+    def AtualizaPrioridade(self, receptor, tipoOrgao, prioridade):
+        self.Heap(tipoOrgao, self.sangue.get(receptor, SEM_TIPAGEM)).Atualiza(receptor, (prioridade, receptor))
+
+    #Define o grupo sanguíneo do receptor (ex.: exame novo), movendo-o para o heap do novo grupo em cada fila
+    def AtualizaSangue(self, receptor, sangue):
+        antigo = self.sangue.get(receptor, SEM_TIPAGEM)
+        if antigo == sangue:
+            return
+
+        for tipoOrgao in self.esperas.get(receptor, set()):
+            chave = self.Heap(tipoOrgao, antigo).Remove(receptor)
+            self.Heap(tipoOrgao, sangue).Insere(receptor, chave)
+
+        self.sangue[receptor] = sangue
+
+    #Primeiro da fila de um órgão: (prioridade, receptor), sem remover
+    def Consulta(self, tipoOrgao):
+        topos = [heap.Topo() for heap in self.filas.get(tipoOrgao, {}).values() if len(heap) > 0]
+        if len(topos) == 0:
+            return None
+
+        chave, receptor = min(topos)
+        return chave[0], receptor
+
+    #Remove e retorna o primeiro da fila de um órgão: (prioridade, receptor)
+    def Extrai(self, tipoOrgao):
+        primeiro = self.Consulta(tipoOrgao)
+        if primeiro is not None:
+            self.Remove(primeiro[1], tipoOrgao)
+
+        return primeiro
+
+    #Os n primeiros da fila de um órgão: [(prioridade, receptor), ...]
+    def Proximos(self, tipoOrgao, n):
+        heaps = list(self.filas.get(tipoOrgao, {}).values())
+        return [(chave[0], receptor) for chave, receptor in Menores(heaps, n)]
+
+    #Os n primeiros da fila que podem receber um órgão com o tipo sanguíneo e Rh informados
+    #Só olha os heaps dos grupos compatíveis, sem percorrer os incompatíveis
+    def ProximosCompativeis(self, tipoOrgao, tipoSanguineo, rh, n):
+        heaps = [heap for grupo, heap in self.filas.get(tipoOrgao, {}).items()
+                 if len(heap) > 0 and Compativel(grupo, tipoSanguineo, rh)]
+        return [(chave[0], receptor) for chave, receptor in Menores(heaps, n)]
+
+    #Todas as esperas: {(receptor, tipo de órgão): prioridade}
+    def Esperas(self):
+        return {(receptor, tipoOrgao): chave[0]
+                for tipoOrgao, grupos in self.filas.items()
+                for heap in grupos.values()
+                for chave, receptor in heap.nos}
+
+#======================================= BANCO ======================================
+
+#Esperas de receptores vivos, as mesmas que a fila deve ter
+SQL_ESPERAS = \
+    "SELECT R.RECEPTOR, R.TIPO_ORGAO, R.PRIORIDADE FROM RECEPTOR_ESPERA R " \
+    "JOIN PACIENTE P ON P.PESSOA = R.RECEPTOR WHERE P.OBITO IS NULL"
+
+#Exames dos receptores em espera, o mais recente com tipagem define o tipo sanguíneo
+SQL_TIPAGENS = \
+    "SELECT E.PACIENTE, E.RESULTADO FROM EXAME E " \
+    "WHERE E.PACIENTE IN (SELECT RECEPTOR FROM RECEPTOR_ESPERA) AND E.RESULTADO LIKE '" + PREFIXO_TIPAGEM + "%' " \
+    "ORDER BY E.DATA_HORARIO"
+
+#Mesmo critério, só para os receptores informados
+SQL_TIPAGENS_RECEPTORES = \
+    "SELECT E.PACIENTE, E.RESULTADO FROM EXAME E " \
+    "WHERE E.PACIENTE IN ({binds}) AND E.RESULTADO LIKE '" + PREFIXO_TIPAGEM + "%' " \
+    "ORDER BY E.DATA_HORARIO"
+
+#Receptores por consulta de tipagens (o Oracle aceita até 1000 numa lista IN)
+TAMANHO_CONSULTA = 500
+
+#Lê as esperas do banco: {(receptor, tipo de órgão): prioridade}
+def LeEsperas(cursor):
+    cursor.execute(SQL_ESPERAS)
+    return {(BaseLocal.IdHex(receptor), tipoOrgao): prioridade for receptor, tipoOrgao, prioridade in cursor.fetchall()}
+
+#Carrega as filas a partir de RECEPTOR_ESPERA (2 consultas, independente do número de receptores)
+def CarregaFilas(pool):
+    filas = FilasEspera()
+
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.arraysize = 5000
+            esperas = LeEsperas(cursor)
+
+            cursor.execute(SQL_TIPAGENS)
+            #Ordenado por data, então o exame mais recente sobrescreve os anteriores
+            for paciente, resultado in cursor.fetchall():
+                filas.sangue[BaseLocal.IdHex(paciente)] = TipoSanguineoExame(resultado)
+
+    for (receptor, tipoOrgao), prioridade in esperas.items():
+        filas.Adiciona(receptor, tipoOrgao, prioridade)
+
+    return filas
+
+#Lê o tipo sanguíneo atual dos receptores informados: {receptor: grupo}, SEM_TIPAGEM para quem não tem exame com tipagem
+def LeTipagens(pool, cursor, receptores):
+    tipagens = dict.fromkeys(receptores, SEM_TIPAGEM)
+    receptores = list(tipagens)
+
+    for i in range(0, len(receptores), TAMANHO_CONSULTA):
+        bloco = receptores[i:i + TAMANHO_CONSULTA]
+        cursor.execute(SQL_TIPAGENS_RECEPTORES.format(binds=", ".join(f":{j + 1}" for j in range(len(bloco)))),
+                       [BaseLocal.BindId(pool, receptor) for receptor in bloco])
+        #Ordenado por data, então o exame mais recente sobrescreve os anteriores
+        for paciente, resultado in cursor.fetchall():
+            tipagens[BaseLocal.IdHex(paciente)] = TipoSanguineoExame(resultado)
+
+    return tipagens
+
+#Nascimento e óbito de um paciente, ou None se o ID não for de um paciente
+def LePaciente(pool, receptor):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT NASCIMENTO, OBITO FROM PACIENTE WHERE PESSOA = :receptor",
+                           {"receptor": BaseLocal.BindId(pool, receptor)})
+            return cursor.fetchone()
+
+#As funções abaixo alteram o banco e, só depois do commit, a fila, para as duas não divergirem
+#As de alteração e remoção retornam False, sem mexer na fila, se nenhuma linha do banco foi afetada
+
+#O tipo sanguíneo é relido: as filas só têm o de quem já esperava quando foram carregadas
+def AdicionaEsperaBanco(pool, filas, receptor, tipoOrgao, prioridade):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO RECEPTOR_ESPERA (RECEPTOR, TIPO_ORGAO, PRIORIDADE) VALUES (:receptor, :tipo, :prioridade)",
+                           {"receptor": BaseLocal.BindId(pool, receptor), "tipo": tipoOrgao, "prioridade": prioridade})
+            conn.commit()
+            sangue = LeTipagens(pool, cursor, [receptor])[receptor]
+
+    filas.AtualizaSangue(receptor, sangue)
+    filas.Adiciona(receptor, tipoOrgao, prioridade)
+
+def AtualizaPrioridadeBanco(pool, filas, receptor, tipoOrgao, prioridade):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE RECEPTOR_ESPERA SET PRIORIDADE = :prioridade WHERE RECEPTOR = :receptor AND TIPO_ORGAO = :tipo",
+                           {"receptor": BaseLocal.BindId(pool, receptor), "tipo": tipoOrgao, "prioridade": prioridade})
+            alteradas = cursor.rowcount
+            conn.commit()
+
+    if alteradas == 0:
+        return False
+
+    filas.AtualizaPrioridade(receptor, tipoOrgao, prioridade)
+    return True
+
+#Transplante realizado ou desistência: a espera deixa de existir
+def RemoveEsperaBanco(pool, filas, receptor, tipoOrgao):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM RECEPTOR_ESPERA WHERE RECEPTOR = :receptor AND TIPO_ORGAO = :tipo",
+                           {"receptor": BaseLocal.BindId(pool, receptor), "tipo": tipoOrgao})
+            removidas = cursor.rowcount
+            conn.commit()
+
+    if removidas == 0:
+        return False
+
+    filas.Remove(receptor, tipoOrgao)
+    return True
+
+#Óbito: PACIENTE.OBITO é preenchido e o receptor sai de todas as filas (as linhas de RECEPTOR_ESPERA ficam como histórico)
+def RegistraObitoBanco(pool, filas, receptor, obito):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE PACIENTE SET OBITO = :obito WHERE PESSOA = :receptor",
+                           {"receptor": BaseLocal.BindId(pool, receptor), "obito": obito})
+            alteradas = cursor.rowcount
+            conn.commit()
+
+    if alteradas == 0:
+        return False
+
+    filas.RemoveReceptor(receptor)
+    return True
+
+#Exames novos (ex.: importados dos laboratórios): relê o tipo sanguíneo dos receptores informados
+#e move quem mudou de grupo para o heap do novo grupo em cada fila; retorna os que mudaram
+def AtualizaTipagensBanco(pool, filas, receptores):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            tipagens = LeTipagens(pool, cursor, receptores)
+
+    mudaram = [receptor for receptor, sangue in tipagens.items() if filas.sangue.get(receptor, SEM_TIPAGEM) != sangue]
+    for receptor in mudaram:
+        filas.AtualizaSangue(receptor, tipagens[receptor])
+
+    return mudaram
+
+#Compara as filas com a tabela e verifica a estrutura dos heaps
+#Retorna a lista de divergências (vazia se estiver tudo consistente)
+def VerificaConsistencia(pool, filas):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.arraysize = 5000
+            banco = LeEsperas(cursor)
+
+    memoria = filas.Esperas()
+    divergencias = []
+
+    for chave in sorted(set(banco) - set(memoria)):
+        divergencias.append(f"Falta na fila: receptor {chave[0]}, órgão {chave[1]}")
+    for chave in sorted(set(memoria) - set(banco)):
+        divergencias.append(f"Sobra na fila: receptor {chave[0]}, órgão {chave[1]}")
+    for chave in sorted(set(banco) & set(memoria)):
+        if banco[chave] != memoria[chave]:
+            divergencias.append(f"Prioridade diferente: receptor {chave[0]}, órgão {chave[1]} "
+                                f"(tabela {banco[chave]}, fila {memoria[chave]})")
+
+    for tipoOrgao, grupos in filas.filas.items():
+        for grupo, heap in grupos.items():
+            if not heap.Valido():
+                divergencias.append(f"Heap inválido: órgão {tipoOrgao}, grupo {grupo}")
+
+    return divergencias
+
+#======================================= VERIFICAÇÃO ======================================
+
+#Aplica operações aleatórias nas filas e compara cada resposta com uma busca por força bruta
+#Também mede o tempo médio das operações com uma fila de 'tamanho' esperas
+def Verificacao(tamanho=20000, operacoes=2000, semente=0):
+    gerador = random.Random(semente)
+    tipos = ["RIM", "FIGADO", "CORACAO", "PULMAO", "PANCREAS"]
+    grupos = [None] + [tipo + rh for tipo in RECEPTORES_COMPATIVEIS for rh in "+-"]
+
+    filas = FilasEspera()
+    referencia = {}
+    for i in range(tamanho):
+        receptor = f"{i:016X}"
+        tipoOrgao = gerador.choice(tipos)
+        filas.sangue[receptor] = gerador.choice(grupos)
+        filas.Adiciona(receptor, tipoOrgao, gerador.randint(1, 50))
+        referencia[(receptor, tipoOrgao)] = filas.Prioridade(receptor, tipoOrgao)
+
+    #Os n primeiros por força bruta: ordena tudo
+    def ProximosReferencia(tipoOrgao, n, filtro=lambda receptor: True):
+        candidatos = sorted((prioridade, receptor) for (receptor, tipo), prioridade in referencia.items()
+                            if tipo == tipoOrgao and filtro(receptor))
+        return candidatos[:n]
+
+    tempos = {}
+    def Mede(operacao, inicio):
+        tempos.setdefault(operacao, []).append(time.perf_counter() - inicio)
+
+    erros = 0
+    for _ in range(operacoes):
+        operacao = gerador.choice(["atualiza", "remove", "adiciona", "extrai", "proximos"])
+        tipoOrgao = gerador.choice(tipos)
+
+        #Só a chamada da fila entra no tempo, a força bruta fica de fora
+        if operacao == "atualiza" and len(referencia) > 0:
+            receptor, tipoOrgao = gerador.choice(list(referencia))
+            prioridade = gerador.randint(1, 50)
+            inicio = time.perf_counter()
+            filas.AtualizaPrioridade(receptor, tipoOrgao, prioridade)
+            Mede(operacao, inicio)
+            referencia[(receptor, tipoOrgao)] = prioridade
+        elif operacao == "remove" and len(referencia) > 0:
+            receptor, tipoOrgao = gerador.choice(list(referencia))
+            inicio = time.perf_counter()
+            filas.Remove(receptor, tipoOrgao)
+            Mede(operacao, inicio)
+            del referencia[(receptor, tipoOrgao)]
+        elif operacao == "adiciona":
+            receptor = f"{gerador.getrandbits(64):016X}"
+            prioridade = gerador.randint(1, 50)
+            filas.sangue[receptor] = gerador.choice(grupos)
+            inicio = time.perf_counter()
+            filas.Adiciona(receptor, tipoOrgao, prioridade)
+            Mede(operacao, inicio)
+            referencia[(receptor, tipoOrgao)] = prioridade
+        elif operacao == "extrai":
+            esperado = ProximosReferencia(tipoOrgao, 1)
+            inicio = time.perf_counter()
+            obtido = filas.Extrai(tipoOrgao)
+            Mede(operacao, inicio)
+            erros += [obtido] != esperado if len(esperado) > 0 else obtido is not None
+            if obtido is not None:
+                del referencia[(obtido[1], tipoOrgao)]
+        elif operacao == "proximos":
+            tipoSanguineo, rh = gerador.choice(list(RECEPTORES_COMPATIVEIS)), gerador.choice("+-")
+            inicio = time.perf_counter()
+            obtido = filas.ProximosCompativeis(tipoOrgao, tipoSanguineo, rh, 10)
+            Mede(operacao, inicio)
+            esperado = ProximosReferencia(tipoOrgao, 10, lambda r: Compativel(filas.sangue[r], tipoSanguineo, rh))
+            erros += obtido != esperado
+
+    print(f"\n==== Verificação da fila de espera ({tamanho} esperas, {operacoes} operações) ====")
+    print(f"Respostas diferentes da força bruta: {erros}")
+    print(f"Heaps válidos: {all(heap.Valido() for grupos in filas.filas.values() for heap in grupos.values())}")
+    print(tabulate([[operacao, len(medidas), f"{sum(medidas) / len(medidas) * 1e6:.1f}"] for operacao, medidas in sorted(tempos.items())],
+                   headers=["Operação", "Quantidade", "Tempo médio (µs)"], tablefmt="psql"))
+
+    return erros
+
+#Receptores de cada heap não vazio: {(tipo de órgão, grupo): {receptor: prioridade}}
+def Estrutura(filas):
+    return {(tipoOrgao, grupo): {receptor: chave[0] for chave, receptor in heap.nos}
+            for tipoOrgao, grupos in filas.filas.items() for grupo, heap in grupos.items() if len(heap) > 0}
+
+#Aplica as operações que alteram o banco numa base local com os dados iniciais
+#Depois de cada uma, a fila mantida tem de ser igual a uma recarregada do zero (mesmos heaps e prioridades)
+def VerificacaoBanco():
+    pool = BaseLocal.PoolLocal()
+    try:
+        Carregador.CarregaBase(pool)
+        filas = CarregaFilas(pool)
+
+        def Exame(paciente, dataHorario, resultado):
+            with pool.acquire() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("INSERT INTO EXAME (PACIENTE, LABORATORIO, DATA_HORARIO, TIPO, MEDICO_SUPERVISOR, RESULTADO) "
+                                   "VALUES (:1, :2, :3, 'HEMOGRAMA COMPLETO', :4, :5)",
+                                   [BaseLocal.BindId(pool, paciente), BaseLocal.BindId(pool, "111111"), dataHorario,
+                                    BaseLocal.BindId(pool, "AAAA1111AAAA1111"), resultado])
+                    conn.commit()
+
+        relatorio = []
+        def Confere(operacao, condicao):
+            recarregada = CarregaFilas(pool)
+            ok = condicao and Estrutura(filas) == Estrutura(recarregada) and len(VerificaConsistencia(pool, filas)) == 0
+            relatorio.append([operacao, "sim" if ok else "NÃO"])
+
+        #Paciente fora da fila, com tipagem A+ num exame
+        AdicionaEsperaBanco(pool, filas, "BBBB1111DDDD1111", "RIM", 2)
+        Confere("adiciona receptor novo (lê a tipagem)", filas.sangue.get("BBBB1111DDDD1111") == "A+")
+
+        #Um segundo órgão para quem já espera mantém o mesmo grupo
+        AdicionaEsperaBanco(pool, filas, "BBBB1111CCCC1111", "PULMAO", 3)
+        Confere("adiciona órgão a quem já espera", filas.Prioridade("BBBB1111CCCC1111", "PULMAO") == 3)
+
+        #Retipagem mais recente muda o grupo em todas as filas do receptor; uma mais antiga não muda nada
+        Exame("BBBB1111CCCC1111", datetime(2025, 1, 10, 9, 0), "TIPO SANGUINEO A-, HLA-C*321")
+        Exame("BBBB1111CCCC2222", datetime(2020, 1, 10, 9, 0), "TIPO SANGUINEO O-, HLA-C*321")
+        mudaram = AtualizaTipagensBanco(pool, filas, ["BBBB1111CCCC1111", "BBBB1111CCCC2222"])
+        Confere("tipagem nova move para o heap do novo grupo",
+                mudaram == ["BBBB1111CCCC1111"] and filas.sangue.get("BBBB1111CCCC1111") == "A-"
+                and "BBBB1111CCCC1111" not in [r for _, r in filas.ProximosCompativeis("PULMAO", "O", "+", 10)])
+
+        RegistraObitoBanco(pool, filas, "BBBB1111CCCC1111", datetime(2025, 6, 1, 3, 0))
+        Confere("óbito remove de todas as filas", "BBBB1111CCCC1111" not in filas.esperas)
+
+        alterou = AtualizaPrioridadeBanco(pool, filas, "BBBB1111DDDD1111", "RIM", 1)
+        removeu = RemoveEsperaBanco(pool, filas, "BBBB1111CCCC2222", "FIGADO")
+        Confere("altera prioridade e remove", alterou and removeu and filas.Tamanho() == 2)
+
+        #A fila tem uma espera que a tabela não tem mais (ex.: apagada por fora): nada muda na fila
+        filas.Adiciona("BBBB1111BBBB1111", "RIM", 5)
+        alterou = AtualizaPrioridadeBanco(pool, filas, "BBBB1111BBBB1111", "RIM", 1)
+        removeu = RemoveEsperaBanco(pool, filas, "BBBB1111BBBB1111", "RIM")
+        intacta = filas.Prioridade("BBBB1111BBBB1111", "RIM") == 5
+        filas.Remove("BBBB1111BBBB1111", "RIM")
+        Confere("sem linha na tabela, a fila não é alterada", not alterou and not removeu and intacta)
+    finally:
+        pool.close()
+
+    print("\n==== Verificação da fila contra a base local ====")
+    print(tabulate(relatorio, headers=["Operação", "Igual à fila recarregada"], tablefmt="psql"))
+
+    return sum(ok != "sim" for _, ok in relatorio)
+
+#Uso: python FilaEspera.py
+if __name__ == "__main__":
+    Verificacao()
+    VerificacaoBanco()
@@ -0,0 +1,526 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Importação em massa de resultados de exames (EXAME) a partir dos arquivos enviados pelos laboratórios
+#Os arquivos são lidos linha a linha e cada linha vai para a fila do seu laboratório, com uma thread por laboratório
+#Cada thread junta as linhas em lotes: resolve os CPFs dos pacientes e os CRMs dos médicos para os IDs com uma
+#consulta por lote (o que já foi resolvido fica em cache), valida tudo o que a base recusaria e insere o lote
+#num único executemany com batcherrors, então uma linha com erro não derruba as outras
+
+from tabulate import tabulate
+from collections import Counter
+from datetime import datetime, timedelta
+import contextlib
+import csv
+import io
+import oracledb
+import os
+import queue
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+import BaseLocal
+import Carregador
+import FilaEspera
+
+#Colunas do arquivo (CSV separado por ';', com cabeçalho)
+#CPF do paciente, ID do laboratório (hexadecimal), data e hora (AAAA-MM-DD HH:MM[:SS]), tipo, CRM do médico supervisor, resultado
+COLUNAS = ["CPF", "LABORATORIO", "DATA_HORARIO", "TIPO", "CRM_SUPERVISOR", "RESULTADO"]
+
+#Linhas por lote (uma ida ao banco para cada consulta de IDs e uma para a inserção)
+TAMANHO_LOTE = 1000
+
+#Lotes que podem esperar na fila de cada laboratório; a leitura dos arquivos para se a fila encher
+LOTES_NA_FILA = 4
+
+#Itens por consulta de IDs (o Oracle aceita até 1000 numa lista IN)
+TAMANHO_CONSULTA = 500
+
+#Exemplos de linhas recusadas guardados por laboratório
+MAXIMO_EXEMPLOS = 20
+
+#Marca o fim da fila de um laboratório
+FIM = None
+
+SQL_PACIENTES = "SELECT P.CPF, P.ID FROM PESSOA P JOIN PACIENTE PA ON PA.PESSOA = P.ID WHERE P.CPF IN ({binds})"
+#CRM é CHAR(9): no Oracle os mais curtos voltam completados com espaços
+#CRM é CHAR(9): a coluna fica sem função para usar o índice, e os binds vão como CHAR (comparação com brancos à direita)
+SQL_MEDICOS = "SELECT RTRIM(CRM), FUNCIONARIO, VALIDADE_CRM FROM MEDICO WHERE CRM IN ({binds})"
+SQL_EXAMES_DISPONIVEIS = "SELECT TIPO FROM EXAMES_DISPONIVEIS WHERE LABORATORIO = :1"
+SQL_INSERT = "INSERT INTO EXAME (PACIENTE, LABORATORIO, DATA_HORARIO, TIPO, MEDICO_SUPERVISOR, RESULTADO) " \
+             "VALUES (:1, :2, :3, :4, :5, :6)"
+
+#======================================= LEITURA ======================================
+
+#CPF com ou sem pontuação -> formato da base (000.000.000-00); None se não tiver 11 dígitos
+def FormataCPF(cpf):
+    numeros = re.sub(r"\D", "", cpf or "")
+    if len(numeros) != 11:
+        return None
+
+    return f"{numeros[:3]}.{numeros[3:6]}.{numeros[6:9]}-{numeros[9:]}"
+
+#Lê os arquivos sem carregá-los inteiros, devolvendo (arquivo, número da linha, dicionário da linha)
+def LeArquivos(arquivos):
+    for arquivo in arquivos:
+        with open(arquivo, newline="", encoding="utf-8") as entrada:
+            leitor = csv.DictReader(entrada, delimiter=";")
+            leitor.fieldnames = [coluna.strip().upper() for coluna in leitor.fieldnames or []]
+
+            faltando = [coluna for coluna in COLUNAS if coluna not in leitor.fieldnames]
+            if len(faltando) > 0:
+                raise ValueError(f"{arquivo}: colunas faltando no cabeçalho: {', '.join(faltando)}")
+
+            #A linha 1 é o cabeçalho
+            for numero, linha in enumerate(leitor, 2):
+                yield arquivo, numero, linha
+
+#======================================= CACHE DE IDS ======================================
+
+#CPF -> ID do paciente e CRM -> (ID do médico, validade do CRM), compartilhado pelas threads
+#Também guarda os que não existem, para não consultá-los de novo
+class CacheIds:
+    def __init__(self):
+        self.pacientes = {}
+        self.medicos = {}
+        self.trava = threading.Lock()
+
+    #Consulta só as chaves que ainda não estão no cache, em blocos de TAMANHO_CONSULTA
+    #tipoBind, se informado, é o tipo de todos os binds da consulta
+    def Resolve(self, cursor, cache, sql, chaves, tipoBind=None):
+        with self.trava:
+            faltando = [chave for chave in set(chaves) if chave not in cache]
+
+        encontrados = {}
+        for i in range(0, len(faltando), TAMANHO_CONSULTA):
+            bloco = faltando[i:i + TAMANHO_CONSULTA]
+            if tipoBind is not None:
+                cursor.setinputsizes(*[tipoBind] * len(bloco))
+            cursor.execute(sql.format(binds=", ".join(f":{j + 1}" for j in range(len(bloco)))), bloco)
+            for linha in cursor.fetchall():
+                encontrados[linha[0]] = linha[1] if len(linha) == 2 else linha[1:]
+
+        with self.trava:
+            for chave in faltando:
+                cache[chave] = encontrados.get(chave)
+
+            return {chave: cache[chave] for chave in chaves}
+
+    def Pacientes(self, cursor, cpfs):
+        return self.Resolve(cursor, self.pacientes, SQL_PACIENTES, cpfs)
+
+    def Medicos(self, cursor, crms):
+        return self.Resolve(cursor, self.medicos, SQL_MEDICOS, crms, oracledb.DB_TYPE_CHAR)
+
+#======================================= LABORATÓRIO ======================================
+
+#Contagens de um laboratório
+class ResultadoLaboratorio:
+    def __init__(self, laboratorio):
+        self.laboratorio = laboratorio
+        self.lidas = 0
+        self.inseridas = 0
+        #Mesmo paciente, laboratório e horário: repetido no próprio arquivo ou já na base
+        self.duplicadas = 0
+        self.recusadas = Counter()
+        #(arquivo, linha, motivo)
+        self.exemplos = []
+        self.erro = None
+        #IDs (hexadecimal) dos pacientes com algum exame de tipagem sanguínea inserido
+        self.tipagens = set()
+
+    def Recusa(self, arquivo, numero, motivo):
+        self.recusadas[motivo] += 1
+        if len(self.exemplos) < MAXIMO_EXEMPLOS:
+            self.exemplos.append((arquivo, numero, motivo))
+
+#Valida um lote já com os IDs resolvidos; retorna as linhas prontas para inserir e de onde cada uma veio
+#Confere tudo o que a base recusaria (restrições CHECK, chaves estrangeiras e UNIQUE dentro do próprio lote)
+#e a validade do CRM na data do exame, que a base não tem como conferir
+def ValidaLote(lote, bindLaboratorio, tipos, pacientes, medicos, vistos, resultado):
+    linhas = []
+    origens = []
+    for arquivo, numero, linha in lote:
+        cpf = FormataCPF(linha["CPF"])
+        tipo = (linha["TIPO"] or "").strip().upper()
+        crm = (linha["CRM_SUPERVISOR"] or "").strip().upper()
+        resultadoExame = (linha["RESULTADO"] or "").strip().upper() or None
+
+        try:
+            dataHorario = datetime.fromisoformat((linha["DATA_HORARIO"] or "").strip())
+        except ValueError:
+            resultado.Recusa(arquivo, numero, "data e hora inválidas")
+            continue
+
+        if cpf is None:
+            resultado.Recusa(arquivo, numero, "CPF inválido")
+        elif pacientes.get(cpf) is None:
+            resultado.Recusa(arquivo, numero, "paciente não cadastrado")
+        elif medicos.get(crm) is None:
+            resultado.Recusa(arquivo, numero, "médico supervisor não cadastrado")
+        elif medicos[crm][1] < dataHorario:
+            resultado.Recusa(arquivo, numero, "CRM do supervisor vencido na data do exame")
+        elif tipo not in tipos:
+            resultado.Recusa(arquivo, numero, "tipo de exame não oferecido pelo laboratório")
+        #CK_EXAME_PACIENTE_DIFERENTE_MEDICO
+        elif pacientes[cpf] == medicos[crm][0]:
+            resultado.Recusa(arquivo, numero, "médico supervisionando o próprio exame")
+        elif resultadoExame is not None and len(resultadoExame) > 100:
+            resultado.Recusa(arquivo, numero, "resultado com mais de 100 caracteres")
+        #UNIQUE_EXAME_PACIENTE_LABORATORIO_DATA_HORARIO, entre as linhas já lidas
+        elif (pacientes[cpf], dataHorario) in vistos:
+            resultado.duplicadas += 1
+        else:
+            vistos.add((pacientes[cpf], dataHorario))
+            linhas.append([pacientes[cpf], bindLaboratorio, dataHorario, tipo, medicos[crm][0], resultadoExame])
+            origens.append((arquivo, numero))
+
+    return linhas, origens
+
+#Valida e insere um lote, com um commit no fim
+def InsereLote(pool, cache, lote, bindLaboratorio, tipos, vistos, resultado):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            pacientes = cache.Pacientes(cursor, [cpf for cpf in (FormataCPF(linha["CPF"]) for _, _, linha in lote) if cpf is not None])
+            medicos = cache.Medicos(cursor, [(linha["CRM_SUPERVISOR"] or "").strip().upper() for _, _, linha in lote])
+
+            linhas, origens = ValidaLote(lote, bindLaboratorio, tipos, pacientes, medicos, vistos, resultado)
+            if len(linhas) == 0:
+                return
+
+            cursor.executemany(SQL_INSERT, linhas, batcherrors=True)
+            erros = cursor.getbatcherrors()
+            for erro in erros:
+                #Exame que já estava na base (ORA-00001 no Oracle)
+                if "ORA-00001" in erro.message or "UNIQUE" in erro.message.upper():
+                    resultado.duplicadas += 1
+                else:
+                    resultado.Recusa(*origens[erro.offset], erro.message.strip())
+
+            resultado.inseridas += len(linhas) - len(erros)
+            recusadas = {erro.offset for erro in erros}
+            resultado.tipagens.update(BaseLocal.IdHex(linha[0]) for i, linha in enumerate(linhas)
+                                      if i not in recusadas and FilaEspera.EhTipagem(linha[5]))
+            conn.commit()
+
+#Thread de um laboratório: consome a fila em lotes até o FIM
+def TrabalhaLaboratorio(pool, cache, laboratorio, fila, resultado):
+    bindLaboratorio = BaseLocal.BindId(pool, laboratorio)
+    #Chaves (paciente, horário) já vistas; o laboratório é sempre o mesmo nesta thread
+    vistos = set()
+    tipos = None
+
+    lote = []
+    while True:
+        item = fila.get()
+        if item is not FIM:
+            lote.append(item)
+            resultado.lidas += 1
+            if len(lote) < TAMANHO_LOTE:
+                continue
+
+        #Depois de um erro de banco, a fila continua sendo esvaziada para a leitura dos arquivos não travar
+        if resultado.erro is None and len(lote) > 0:
+            try:
+                if tipos is None:
+                    with pool.acquire() as conn:
+                        with conn.cursor() as cursor:
+                            cursor.execute(SQL_EXAMES_DISPONIVEIS, [bindLaboratorio])
+                            tipos = {linha[0] for linha in cursor.fetchall()}
+
+                InsereLote(pool, cache, lote, bindLaboratorio, tipos, vistos, resultado)
+            except Exception as e:
+                resultado.erro = e
+        lote = []
+
+        if item is FIM:
+            return
+
+#======================================= IMPORTAÇÃO ======================================
+
+#Importa os arquivos; retorna o resultado de cada laboratório (ID hexadecimal -> ResultadoLaboratorio)
+#Linhas sem laboratório válido ficam no resultado da chave None
+def ImportaExames(pool, arquivos, cache=None):
+    cache = cache if cache is not None else CacheIds()
+    resultados = {None: ResultadoLaboratorio(None)}
+    filas = {}
+    threads = []
+
+    try:
+        for arquivo, numero, linha in LeArquivos(arquivos):
+            laboratorio = (linha["LABORATORIO"] or "").strip().upper()
+            if not re.match(r"^([0-9A-F]{2}){1,6}$", laboratorio):
+                resultados[None].lidas += 1
+                resultados[None].Recusa(arquivo, numero, "ID de laboratório inválido")
+                continue
+
+            if laboratorio not in filas:
+                filas[laboratorio] = queue.Queue(maxsize=TAMANHO_LOTE * LOTES_NA_FILA)
+                resultados[laboratorio] = ResultadoLaboratorio(laboratorio)
+                thread = threading.Thread(target=TrabalhaLaboratorio,
+                                          args=(pool, cache, laboratorio, filas[laboratorio], resultados[laboratorio]))
+                thread.start()
+                threads.append(thread)
+
+            filas[laboratorio].put((arquivo, numero, linha))
+    finally:
+        #Mesmo se a leitura falhar, as threads terminam o que já receberam
+        for fila in filas.values():
+            fila.put(FIM)
+        for thread in threads:
+            thread.join()
+
+    if resultados[None].lidas == 0:
+        del resultados[None]
+
+    return resultados
+
+#Pacientes que receberam algum exame de tipagem sanguínea na importação, para atualizar a fila de espera
+def PacientesTipados(resultados):
+    return set().union(*(resultado.tipagens for resultado in resultados.values()))
+
+def ImprimeResultados(resultados, tempo):
+    relatorio = []
+    for laboratorio, resultado in resultados.items():
+        relatorio.append([laboratorio or "-", resultado.lidas, resultado.inseridas, resultado.duplicadas,
+                          sum(resultado.recusadas.values()), "" if resultado.erro is None else str(resultado.erro)])
+
+    lidas = sum(resultado.lidas for resultado in resultados.values())
+    print(f"\n==== Importação de exames: {lidas} linhas em {tempo:.2f}s ({lidas / max(tempo, 1e-9):.0f} linhas/s) ====")
+    print(tabulate(relatorio, headers=["Laboratório", "Lidas", "Inseridas", "Duplicadas", "Recusadas", "Erro"], tablefmt="psql"))
+
+    motivos = Counter()
+    exemplos = []
+    for resultado in resultados.values():
+        motivos.update(resultado.recusadas)
+        exemplos += resultado.exemplos
+
+    if len(motivos) > 0:
+        print("\nMotivos das recusas:")
+        print(tabulate(motivos.most_common(), headers=["Motivo", "Linhas"], tablefmt="psql"))
+        print("\nExemplos:")
+        for arquivo, numero, motivo in exemplos[:MAXIMO_EXEMPLOS]:
+            print(f"- {arquivo}, linha {numero}: {motivo}")
+
+    #Print de separação, para facilitar a legibilidade
+    print("")
+
+#======================================= VERIFICAÇÃO E BENCHMARK ======================================
+
+#Forma ingênua (uma consulta por CPF e por CRM e um INSERT por linha), mantida apenas para comparação no benchmark
+#Não confere tipo, CRM nem CK_EXAME_PACIENTE_DIFERENTE_MEDICO, então na base local (sem CHECK) insere algumas linhas a mais
+def ImportaExamesIngenuo(pool, arquivos):
+    inseridas = 0
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            for _, _, linha in LeArquivos(arquivos):
+                cursor.execute(SQL_PACIENTES.format(binds=":1"), [FormataCPF(linha["CPF"])])
+                paciente = cursor.fetchone()
+                cursor.setinputsizes(oracledb.DB_TYPE_CHAR)
+                cursor.execute(SQL_MEDICOS.format(binds=":1"), [linha["CRM_SUPERVISOR"].strip().upper()])
+                medico = cursor.fetchone()
+                if paciente is None or medico is None:
+                    continue
+
+                try:
+                    cursor.execute(SQL_INSERT, [paciente[1], BaseLocal.BindId(pool, linha["LABORATORIO"].strip().upper()),
+                                                datetime.fromisoformat(linha["DATA_HORARIO"].strip()), linha["TIPO"].strip().upper(),
+                                                medico[1], linha["RESULTADO"].strip().upper() or None])
+                    inseridas += 1
+                except Exception:
+                    pass
+            conn.commit()
+
+    return inseridas
+
+#Gera um arquivo por laboratório com exames válidos e com erros injetados
+#Retorna os caminhos e as contagens esperadas: inseridas, duplicadas e recusadas por motivo
+def GeraArquivos(pool, pasta, quantidade, semente=0):
+    gerador = random.Random(semente)
+
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT P.CPF, P.ID FROM PESSOA P JOIN PACIENTE PA ON PA.PESSOA = P.ID")
+            pacientes = cursor.fetchall()
+            cursor.execute("SELECT RTRIM(CRM), FUNCIONARIO, VALIDADE_CRM FROM MEDICO")
+            medicos = cursor.fetchall()
+            cursor.execute("SELECT LABORATORIO, TIPO FROM EXAMES_DISPONIVEIS")
+            disponiveis = cursor.fetchall()
+
+    tipos = {}
+    for laboratorio, tipo in disponiveis:
+        tipos.setdefault(BaseLocal.IdHex(laboratorio), []).append(tipo)
+    laboratorios = sorted(tipos)
+    todosTipos = sorted({tipo for _, tipo in disponiveis})
+
+    #Médicos que também são pacientes, para testar CK_EXAME_PACIENTE_DIFERENTE_MEDICO; ficam fora dos sorteios comuns
+    idsMedicos = {idMedico for _, idMedico, _ in medicos}
+    medicoPaciente = [(cpf, crm) for cpf, idPaciente in pacientes for crm, idMedico, _ in medicos if idPaciente == idMedico]
+    pacientes = [(cpf, idPaciente) for cpf, idPaciente in pacientes if idPaciente not in idsMedicos]
+
+    esperado = Counter()
+    linhas = {laboratorio: [] for laboratorio in laboratorios}
+    #Linhas válidas já escritas, de onde saem as repetidas
+    validas = {laboratorio: [] for laboratorio in laboratorios}
+    vistos = set()
+    inicio = datetime(2024, 1, 1)
+    for _ in range(quantidade):
+        laboratorio = gerador.choice(laboratorios)
+        cpf, idPaciente = gerador.choice(pacientes)
+        crm, idMedico, validade = gerador.choice(medicos)
+        tipo = gerador.choice(tipos[laboratorio])
+        dataHorario = inicio + timedelta(minutes=gerador.randrange(2 * 365 * 24 * 60))
+        resultado = gerador.choice(["NORMAL", "ALTERADO", "TIPO SANGUINEO A+", "NEGATIVO"])
+
+        sorteio = gerador.random()
+        if sorteio < 0.02:
+            cpf = FormataCPF(f"{gerador.randrange(10 ** 11):011d}")
+            esperado["paciente não cadastrado"] += 1
+        elif sorteio < 0.04:
+            tipo = gerador.choice([t for t in todosTipos if t not in tipos[laboratorio]] or ["RAIO X"])
+            esperado["tipo de exame não oferecido pelo laboratório"] += 1
+        elif sorteio < 0.05 and len(medicoPaciente) > 0:
+            cpf, crm = gerador.choice(medicoPaciente)
+            esperado["médico supervisionando o próprio exame"] += 1
+        elif sorteio < 0.06:
+            dataHorario = validade + timedelta(days=1)
+            esperado["CRM do supervisor vencido na data do exame"] += 1
+        elif sorteio < 0.07:
+            dataHorario = "31/12/2024 10:00"
+            esperado["data e hora inválidas"] += 1
+        elif sorteio < 0.10 and len(validas[laboratorio]) > 0:
+            #Mesmo paciente e horário de uma linha válida já escrita (o resultado pode mudar)
+            linha = list(gerador.choice(validas[laboratorio]))
+            linha[-1] = resultado
+            linhas[laboratorio].append(linha)
+            esperado["duplicadas"] += 1
+            continue
+        elif (idPaciente, dataHorario) in vistos:
+            continue
+        else:
+            vistos.add((idPaciente, dataHorario))
+            esperado["inseridas"] += 1
+
+        #CPF às vezes sem pontuação, como alguns sistemas exportam
+        cpf = cpf.replace(".", "").replace("-", "") if gerador.random() < 0.3 else cpf
+        dataHorario = dataHorario if isinstance(dataHorario, str) else dataHorario.strftime("%Y-%m-%d %H:%M")
+        linhas[laboratorio].append([cpf, laboratorio, dataHorario, tipo, crm, resultado])
+        if sorteio >= 0.10:
+            validas[laboratorio].append(linhas[laboratorio][-1])
+
+    arquivos = []
+    for laboratorio, linhasLaboratorio in linhas.items():
+        caminho = os.path.join(pasta, f"exames_{laboratorio}.csv")
+        with open(caminho, "w", newline="", encoding="utf-8") as saida:
+            escritor = csv.writer(saida, delimiter=";")
+            escritor.writerow(COLUNAS)
+            escritor.writerows(linhasLaboratorio)
+        arquivos.append(caminho)
+
+    return arquivos, esperado
+
+#Soma as contagens de todos os laboratórios no mesmo formato de GeraArquivos
+def Contagens(resultados):
+    contagens = Counter()
+    for resultado in resultados.values():
+        contagens["inseridas"] += resultado.inseridas
+        contagens["duplicadas"] += resultado.duplicadas
+        contagens.update(resultado.recusadas)
+
+    return contagens
+
+#(paciente, data e hora) dos exames de tipagem sanguínea da base
+def ExamesTipagem(pool):
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT PACIENTE, DATA_HORARIO FROM EXAME WHERE RESULTADO LIKE '{FilaEspera.PREFIXO_TIPAGEM}%'")
+            return {(BaseLocal.IdHex(paciente), dataHorario) for paciente, dataHorario in cursor.fetchall()}
+
+#Importa arquivos gerados numa base local e confere as contagens com as esperadas
+#Depois importa os mesmos arquivos de novo: nada pode ser inserido, tudo o que entrou vira duplicado
+def Verificacao(quantidade=20000, semente=0):
+    pool = BaseLocal.PoolLocal()
+    pasta = tempfile.mkdtemp(prefix="exames")
+    try:
+        Carregador.CarregaBase(pool)
+        BaseLocal.InserePacientesSinteticos(pool, 2000, semente)
+        #Um médico que também é paciente
+        with pool.acquire() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("INSERT INTO PACIENTE (PESSOA, SEXO, NASCIMENTO, COR, PESO) VALUES ('AAAA1111AAAA2222', 'M', :1, 'PARDO', 80)",
+                               [datetime(1980, 5, 17)])
+                conn.commit()
+
+        arquivos, esperado = GeraArquivos(pool, pasta, quantidade, semente)
+        tipagensAntes = ExamesTipagem(pool)
+
+        inicio = time.perf_counter()
+        resultados = ImportaExames(pool, arquivos)
+        ImprimeResultados(resultados, time.perf_counter() - inicio)
+        obtido = Contagens(resultados)
+        #Os pacientes com exame de tipagem novo na base são exatamente os apontados pela importação
+        tipadosEsperado = {paciente for paciente, _ in ExamesTipagem(pool) - tipagensAntes}
+        tipadosObtido = PacientesTipados(resultados)
+
+        reimportacao = ImportaExames(pool, arquivos)
+        reimportado = Contagens(reimportacao)
+        esperadoReimportado = Counter(esperado)
+        esperadoReimportado["duplicadas"] += esperadoReimportado.pop("inseridas")
+
+        print("==== Verificação da importação ====")
+        print(tabulate([[motivo, esperado[motivo], obtido[motivo], esperadoReimportado[motivo], reimportado[motivo]]
+                        for motivo in sorted(set(esperado) | set(obtido) | set(reimportado))],
+                       headers=["Contagem", "Esperado", "Obtido", "Esperado (2ª vez)", "Obtido (2ª vez)"], tablefmt="psql"))
+        print("Contagens iguais às esperadas: " + ("sim" if obtido == esperado and reimportado == esperadoReimportado else "NÃO"))
+        print(f"Pacientes com tipagem nova: {len(tipadosObtido)} de {len(tipadosEsperado)} esperados, "
+              f"{len(PacientesTipados(reimportacao))} na 2ª vez - "
+              + ("sim" if tipadosObtido == tipadosEsperado and len(PacientesTipados(reimportacao)) == 0 else "NÃO"))
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+        pool.close()
+
+#Compara a importação em lotes com a ingênua, em idas ao banco e tempo
+#latencia -> atraso simulado por ida ao banco (segundos); a forma ingênua só roda até limiteIngenuo linhas
+def Benchmark(tamanhos=(1000, 10000, 100000), latencia=0.001, limiteIngenuo=1000, semente=0):
+    relatorio = []
+    for tamanho in tamanhos:
+        formas = [("Lotes", ImportaExames)]
+        if tamanho <= limiteIngenuo:
+            formas.append(("Ingênua", ImportaExamesIngenuo))
+
+        for nome, importa in formas:
+            #Base nova a cada medição, para as duas formas inserirem as mesmas linhas
+            pool = BaseLocal.PoolLocal()
+            pasta = tempfile.mkdtemp(prefix="exames")
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    Carregador.CarregaBase(pool)
+                BaseLocal.InserePacientesSinteticos(pool, 5000, semente)
+                arquivos, _ = GeraArquivos(pool, pasta, tamanho, semente)
+                medido = BaseLocal.PoolMedido(pool, latencia)
+
+                inicio = time.perf_counter()
+                resultado = importa(medido, arquivos)
+                tempo = time.perf_counter() - inicio
+
+                inseridas = Contagens(resultado)["inseridas"] if isinstance(resultado, dict) else resultado
+                relatorio.append([tamanho, nome, inseridas, medido.idas, f"{tempo:.2f}", f"{tamanho / tempo:.0f}"])
+            finally:
+                shutil.rmtree(pasta, ignore_errors=True)
+                pool.close()
+
+    print(f"\n==== Benchmark da importação (latência simulada de {latencia * 1000:.1f}ms por ida) ====")
+    print(tabulate(relatorio, headers=["Linhas", "Forma", "Inseridas", "Idas ao banco", "Tempo (s)", "Linhas/s"], tablefmt="psql"))
+
+#Uso: python Ingestao.py
+#Roda a verificação e o benchmark em bases locais temporárias
+if __name__ == "__main__":
+    Verificacao()
+    Benchmark()
@@ -0,0 +1,274 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Réplica local (arquivo SQLite) de PESSOA e PACIENTE, para buscas de leitura sem ir até o Oracle
+#A sincronização é incremental: cada tabela guarda a marca d'água (maior ORA_ROWSCN já copiado)
+#e só as linhas alteradas depois dela são trazidas; exclusões não mudam o ORA_ROWSCN de nenhuma linha que sobrou,
+#então a cada sincronização também são comparados só os IDs, e o que sumiu do principal é apagado da réplica
+
+from tabulate import tabulate
+import oracledb
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+#IdHex das chaves copiadas; a verificação usa a base local e o carregador
+import BaseLocal
+import Carregador
+
+#Tabelas replicadas: colunas (a primeira é a chave) e criação na réplica
+TABELAS = {
+    "PESSOA": {
+        "COLUNAS": ["ID", "CPF", "NOME", "ESTADO", "CIDADE", "BAIRRO", "RUA", "NUMERO", "TELEFONE1", "TELEFONE2"],
+        "DDL": [
+            "CREATE TABLE IF NOT EXISTS PESSOA (ID TEXT PRIMARY KEY, CPF TEXT NOT NULL, NOME TEXT NOT NULL, "
+            "ESTADO TEXT, CIDADE TEXT, BAIRRO TEXT, RUA TEXT, NUMERO INTEGER, TELEFONE1 TEXT, TELEFONE2 TEXT)",
+            #Índices para os filtros de igualdade da busca de pessoas
+            #O nome é buscado por trecho (LIKE '%...%'), que nenhum índice atende; réplicas antigas ainda têm esse índice
+            "CREATE UNIQUE INDEX IF NOT EXISTS IDX_PESSOA_CPF ON PESSOA (CPF)",
+            "DROP INDEX IF EXISTS IDX_PESSOA_NOME",
+            "CREATE INDEX IF NOT EXISTS IDX_PESSOA_ENDERECO ON PESSOA (ESTADO, CIDADE, BAIRRO, RUA, NUMERO)",
+            "CREATE INDEX IF NOT EXISTS IDX_PESSOA_TELEFONE1 ON PESSOA (TELEFONE1)",
+            "CREATE INDEX IF NOT EXISTS IDX_PESSOA_TELEFONE2 ON PESSOA (TELEFONE2)",
+        ],
+    },
+    "PACIENTE": {
+        "COLUNAS": ["PESSOA", "SEXO", "NASCIMENTO", "OBITO", "COR", "PESO", "TELEFONE_EMERGENCIA1", "TELEFONE_EMERGENCIA2"],
+        "DDL": [
+            "CREATE TABLE IF NOT EXISTS PACIENTE (PESSOA TEXT PRIMARY KEY, SEXO TEXT NOT NULL, NASCIMENTO DATE NOT NULL, "
+            "OBITO DATE, COR TEXT NOT NULL, PESO REAL NOT NULL, TELEFONE_EMERGENCIA1 TEXT, TELEFONE_EMERGENCIA2 TEXT)",
+        ],
+    },
+}
+
+#Linhas trazidas por viagem ao banco principal
+TAMANHO_FETCH = 5000
+
+class Replica:
+    #defasagemMaxima -> segundos desde a última sincronização para a réplica ainda ser usada nas buscas
+    def __init__(self, caminho, defasagemMaxima=60):
+        self.caminho = caminho
+        self.defasagemMaxima = defasagemMaxima
+        #Impede duas sincronizações ao mesmo tempo (a periódica e uma pedida pelo usuário)
+        self.trava = threading.Lock()
+        self.parar = threading.Event()
+        self.ultimoErro = None
+
+        with self.Conecta() as conn:
+            #WAL -> as buscas continuam lendo enquanto a sincronização escreve
+            conn.execute("PRAGMA journal_mode = WAL")
+            for info in TABELAS.values():
+                for comando in info["DDL"]:
+                    conn.execute(comando)
+
+            #Marca d'água de cada tabela e o momento em que a cópia começou
+            conn.execute("CREATE TABLE IF NOT EXISTS CONTROLE (TABELA TEXT PRIMARY KEY, MARCA INTEGER NOT NULL, SINCRONIZADO_EM REAL)")
+            conn.executemany("INSERT OR IGNORE INTO CONTROLE (TABELA, MARCA) VALUES (?, 0)", [[tabela] for tabela in TABELAS])
+
+    #Uma conexão por operação, podem vir de threads diferentes
+    #Faz commit se o bloco terminar sem erro, rollback se não, e sempre fecha a conexão
+    @contextmanager
+    def Conecta(self):
+        conn = sqlite3.connect(self.caminho, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    #Segundos desde a última sincronização completa, ou None se nunca foi sincronizada
+    def Defasagem(self):
+        with self.Conecta() as conn:
+            momentos = [linha[0] for linha in conn.execute("SELECT SINCRONIZADO_EM FROM CONTROLE")]
+
+        if None in momentos:
+            return None
+
+        return time.time() - min(momentos)
+
+    def EstaAtualizada(self):
+        defasagem = self.Defasagem()
+        return defasagem is not None and defasagem <= self.defasagemMaxima
+
+    #Copia do banco principal as linhas alteradas desde a última marca d'água
+    #e apaga da réplica as linhas que não existem mais no principal
+    #Retorna o número de linhas copiadas por tabela
+    def Sincroniza(self, pool):
+        with self.trava:
+            copiadas = {}
+
+            with self.Conecta() as replica:
+                for tabela, info in TABELAS.items():
+                    marca = replica.execute("SELECT MARCA FROM CONTROLE WHERE TABELA = ?", [tabela]).fetchone()[0]
+                    #Os dados valem a partir do início da consulta, não do fim
+                    inicio = time.time()
+
+                    sqlSelect = f"SELECT {', '.join(info['COLUNAS'])}, ORA_ROWSCN FROM {tabela} WHERE ORA_ROWSCN > :marca"
+                    binds = ", ".join("?" for _ in info["COLUNAS"])
+                    sqlUpsert = f"INSERT OR REPLACE INTO {tabela} ({', '.join(info['COLUNAS'])}) VALUES ({binds})"
+
+                    copiadas[tabela] = 0
+                    with pool.acquire() as conn:
+                        with conn.cursor() as cursor:
+                            cursor.arraysize = TAMANHO_FETCH
+                            cursor.execute(sqlSelect, {"marca": marca})
+
+                            while True:
+                                linhas = cursor.fetchmany(TAMANHO_FETCH)
+                                if len(linhas) == 0:
+                                    break
+
+                                #A chave vem como RAW (bytes) do Oracle, na réplica fica em hexadecimal
+                                replica.executemany(sqlUpsert, [[BaseLocal.IdHex(linha[0])] + list(linha[1:-1]) for linha in linhas])
+                                marca = max(marca, max(linha[-1] for linha in linhas))
+                                copiadas[tabela] += len(linhas)
+
+                            #Sem isso, uma linha apagada no principal continuaria nas buscas como se estivesse atualizada
+                            cursor.execute(f"SELECT {info['COLUNAS'][0]} FROM {tabela}")
+                            self.Reconcilia(replica, tabela, info["COLUNAS"][0], cursor)
+
+                    replica.execute("UPDATE CONTROLE SET MARCA = ?, SINCRONIZADO_EM = ? WHERE TABELA = ?", [marca, inicio, tabela])
+
+            return copiadas
+
+    #Apaga da réplica as linhas cujos IDs não estão mais no banco principal
+    #cursor -> consulta já executada no principal que traz só os IDs, lidos em blocos
+    def Reconcilia(self, replica, tabela, chave, cursor):
+        replica.execute("CREATE TEMP TABLE IF NOT EXISTS IDS_PRINCIPAL (ID TEXT PRIMARY KEY)")
+        replica.execute("DELETE FROM IDS_PRINCIPAL")
+        while True:
+            ids = cursor.fetchmany(TAMANHO_FETCH)
+            if len(ids) == 0:
+                break
+            replica.executemany("INSERT INTO IDS_PRINCIPAL (ID) VALUES (?)", [[BaseLocal.IdHex(linha[0])] for linha in ids])
+        replica.execute(f"DELETE FROM {tabela} WHERE {chave} NOT IN (SELECT ID FROM IDS_PRINCIPAL)")
+
+    #Executa uma consulta de leitura na réplica, com binds nomeados (mesmo SQL usado no principal)
+    #Retorna os nomes das colunas e as linhas
+    def Consulta(self, sql, dados):
+        with self.Conecta() as conn:
+            cursor = conn.execute(sql, dados)
+            return [desc[0] for desc in cursor.description], cursor.fetchall()
+
+    #Sincroniza a cada 'intervalo' segundos numa thread em segundo plano
+    #Os erros (ex.: banco principal fora do ar) ficam em ultimoErro, sem interromper a aplicação
+    def IniciaSincronizacao(self, pool, intervalo=30):
+        def Laco():
+            while not self.parar.wait(intervalo):
+                try:
+                    self.Sincroniza(pool)
+                    self.ultimoErro = None
+                except Exception as e:
+                    self.ultimoErro = e
+
+        threading.Thread(target=Laco, daemon=True).start()
+
+    def Para(self):
+        self.parar.set()
+
+#======================================= VERIFICAÇÃO ======================================
+
+#Pool cujo banco principal está fora do ar
+class PoolForaDoAr:
+    def acquire(self):
+        raise oracledb.DatabaseError("ORA-12541: TNS:no listener (simulado)")
+
+#Sincroniza uma réplica com uma base local com os dados iniciais e confere a propagação de inserções,
+#alterações e exclusões, o avanço da marca d'água e a escolha entre réplica e principal nas buscas
+def Verificacao():
+    #ConsultaLeitura é da aplicação, que importa este módulo
+    import Aplicacao
+
+    pool = BaseLocal.PoolLocal()
+    pasta = tempfile.mkdtemp(prefix="replica")
+    replica = Replica(os.path.join(pasta, "replica.db"), defasagemMaxima=60)
+    relatorio = []
+
+    def Executa(sql, dados):
+        with pool.acquire() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, dados)
+                conn.commit()
+
+    def Marca(tabela):
+        with replica.Conecta() as conn:
+            return conn.execute("SELECT MARCA FROM CONTROLE WHERE TABELA = ?", [tabela]).fetchone()[0]
+
+    def Pessoa(idPessoa):
+        return replica.Consulta("SELECT NOME FROM PESSOA WHERE ID = :id", {"id": idPessoa})[1]
+
+    def Confere(verificacao, condicao):
+        relatorio.append([verificacao, "sim" if condicao else "NÃO"])
+
+    try:
+        Carregador.CarregaBase(pool)
+        with pool.acquire() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM PESSOA")
+                pessoas = cursor.fetchone()[0]
+
+        Confere("réplica nova não está atualizada", replica.Defasagem() is None and not replica.EstaAtualizada())
+
+        copiadas = replica.Sincroniza(pool)
+        marca = Marca("PESSOA")
+        Confere("primeira sincronização copia tudo", copiadas["PESSOA"] == pessoas and replica.EstaAtualizada())
+        Confere("sem alterações, nada é copiado e a marca fica", replica.Sincroniza(pool)["PESSOA"] == 0 and Marca("PESSOA") == marca)
+
+        Executa("INSERT INTO PESSOA (ID, CPF, NOME) VALUES (:id, '999.999.999-99', 'PESSOA NOVA')", {"id": "ABCDEF0123456789"})
+        copiadas = replica.Sincroniza(pool)
+        Confere("inserção propagada e marca avança",
+                copiadas["PESSOA"] == 1 and Pessoa("ABCDEF0123456789") == [("PESSOA NOVA",)] and Marca("PESSOA") > marca)
+        marca = Marca("PESSOA")
+
+        Executa("UPDATE PESSOA SET NOME = 'PESSOA RENOMEADA' WHERE ID = :id", {"id": "ABCDEF0123456789"})
+        copiadas = replica.Sincroniza(pool)
+        Confere("alteração propagada (só a linha alterada) e marca avança",
+                copiadas["PESSOA"] == 1 and Pessoa("ABCDEF0123456789") == [("PESSOA RENOMEADA",)] and Marca("PESSOA") > marca)
+
+        Executa("DELETE FROM PESSOA WHERE ID = :id", {"id": "ABCDEF0123456789"})
+        replica.Sincroniza(pool)
+        Confere("exclusão propagada na sincronização seguinte", Pessoa("ABCDEF0123456789") == [])
+
+        Aplicacao.replica = replica
+        sql = "SELECT ID, NOME FROM PESSOA WHERE CPF = :cpf"
+        dados = {"cpf": "999.999.999-99"}
+        Executa("INSERT INTO PESSOA (ID, CPF, NOME) VALUES (:id, '999.999.999-99', 'SÓ NO PRINCIPAL')", {"id": "ABCDEF0123456789"})
+
+        _, linhas, origem = Aplicacao.ConsultaLeitura(pool, sql, dados)
+        Confere("atualizada: busca na réplica", origem.startswith("réplica local, atualizada") and linhas == [])
+
+        #Envelhece a última sincronização além da defasagem máxima
+        with replica.Conecta() as conn:
+            conn.execute("UPDATE CONTROLE SET SINCRONIZADO_EM = SINCRONIZADO_EM - ?", [2 * replica.defasagemMaxima])
+        _, linhas, origem = Aplicacao.ConsultaLeitura(pool, sql, dados)
+        Confere("desatualizada: busca no principal", origem == "banco principal" and len(linhas) == 1)
+
+        _, linhas, origem = Aplicacao.ConsultaLeitura(PoolForaDoAr(), sql, dados)
+        Confere("principal fora do ar: réplica desatualizada, com aviso", origem.startswith("réplica local DESATUALIZADA"))
+
+        Aplicacao.replica = Replica(os.path.join(pasta, "nunca_sincronizada.db"))
+        try:
+            Aplicacao.ConsultaLeitura(PoolForaDoAr(), sql, dados)
+            Confere("principal fora do ar e réplica nunca sincronizada: erro", False)
+        except oracledb.Error:
+            Confere("principal fora do ar e réplica nunca sincronizada: erro", True)
+    finally:
+        Aplicacao.replica = None
+        pool.close()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    print("\n==== Verificação da réplica contra a base local ====")
+    print(tabulate(relatorio, headers=["Verificação", "OK"], tablefmt="psql"))
+
+    return sum(ok != "sim" for _, ok in relatorio)
+
+#Uso: python Replica.py
+if __name__ == "__main__":
+    Verificacao()
@@ -0,0 +1,592 @@
+#Daniel Umeda Kuhn - 13676541
+#Gustavo Curado Ribeiro - 14576732
+#Luís Filipe Silva Forti - 14592348
+#Manoel Thomaz Gama da Silva Neto - 13676392
+#Pedro Fuziwara Filho - 13676840
+
+#Reprodução de sessões do menu a partir de roteiros de teclado (gravados ou gerados), contra uma base local
+#Cada sessão roda numa thread com o seu roteiro; input, print e tabulate dos módulos da aplicação são trocados
+#por versões que leem o roteiro da thread, guardam a saída e medem quanto tempo cada etapa levou:
+#validação, verificação de existência, acesso ao banco do fluxo (inserção, busca, ...) e exibição
+
+import argparse
+import builtins
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from tabulate import tabulate
+
+import Alocacao
+import Aplicacao
+import BaseLocal
+import Carregador
+import Dossie
+import Duplicados
+import FilaEspera
+import Ingestao
+
+#Funções da aplicação medidas como uma etapa: (etapa, funções)
+ETAPAS = [
+    ("validacao", ["VerificaCPF", "VerificaEstado", "VerificarNumeroResidencia", "VerificaTelefone", "VerificaCor"]),
+    ("existencia", ["VerificaExistenciaPessoaPaciente"]),
+]
+
+#Fluxos do menu: o tempo com uma conexão do banco aberta dentro deles (fora de outra etapa) vira a etapa do fluxo
+FLUXOS = {
+    "InsertPessoaPaciente": "insercao",
+    "SelectPessoa": "busca",
+    "SelectDossie": "dossie",
+    "MenuFilaEspera": "fila",
+    "CarregaBase": "carga",
+    "SelectDuplicados": "duplicados",
+    "InsertExames": "exames",
+}
+
+#Módulos cuja saída (print/tabulate) é capturada e medida como exibição
+MODULOS_EXIBICAO = [Aplicacao, Alocacao, Carregador, Dossie, Duplicados, FilaEspera, Ingestao]
+
+#Ordem das etapas no relatório
+ORDEM_ETAPAS = ["validacao", "existencia", "insercao", "busca", "dossie", "fila", "carga", "duplicados", "exames", "exibicao", "controle", "sessao"]
+
+#Sessão sendo reproduzida por cada thread
+local = threading.local()
+
+#======================================= SESSÃO ======================================
+
+class Sessao:
+    #pausa -> segundos de "digitação" antes de cada entrada (não entram nas latências)
+    def __init__(self, nome, entradas, pausa=0.0):
+        self.nome = nome
+        self.entradas = list(entradas)
+        self.posicao = 0
+        self.pausa = pausa
+        self.saida = io.StringIO()
+        self.fluxo = None
+        #Etapas abertas: [etapa, início, tempo das etapas internas]
+        self.pilha = []
+        #Etapa -> durações (segundos) de cada chamada, sem o tempo das etapas internas
+        self.amostras = defaultdict(list)
+        self.erro = None
+
+    def Entra(self, etapa):
+        self.pilha.append([etapa, time.perf_counter(), 0.0])
+
+    def Sai(self):
+        etapa, inicio, internas = self.pilha.pop()
+        duracao = time.perf_counter() - inicio
+        self.amostras[etapa].append(duracao - internas)
+
+        if len(self.pilha) > 0:
+            self.pilha[-1][2] += duracao
+
+    #Próxima entrada do roteiro; EOFError se acabou, como o input() no fim da entrada padrão
+    def Le(self, mensagem):
+        self.saida.write(mensagem)
+
+        if self.posicao >= len(self.entradas):
+            raise EOFError("roteiro terminou antes do fim da sessão")
+
+        entrada = self.entradas[self.posicao]
+        self.posicao += 1
+
+        if self.pausa > 0:
+            time.sleep(self.pausa)
+
+        self.saida.write(entrada + "\n")
+        return entrada
+
+#Mede uma chamada como etapa da sessão da thread atual
+def Medida(etapa, funcao):
+    def Envolvida(*args, **kwargs):
+        sessao = getattr(local, "sessao", None)
+        if sessao is None:
+            return funcao(*args, **kwargs)
+
+        sessao.Entra(etapa)
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            sessao.Sai()
+
+    return Envolvida
+
+#Marca o fluxo do menu em andamento, usado para nomear o tempo de banco
+def Fluxo(nome, funcao):
+    def Envolvida(*args, **kwargs):
+        sessao = getattr(local, "sessao", None)
+        if sessao is None:
+            return funcao(*args, **kwargs)
+
+        anterior = sessao.fluxo
+        sessao.fluxo = nome
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            sessao.fluxo = anterior
+
+    return Envolvida
+
+def Entrada(mensagem=""):
+    sessao = getattr(local, "sessao", None)
+    if sessao is None:
+        return builtins.input(mensagem)
+
+    return sessao.Le(mensagem)
+
+def Imprime(*args, **kwargs):
+    sessao = getattr(local, "sessao", None)
+    if sessao is None:
+        return builtins.print(*args, **kwargs)
+
+    kwargs["file"] = sessao.saida
+    builtins.print(*args, **kwargs)
+
+#Pool entregue às sessões: o tempo entre pegar a conexão e devolvê-la é a etapa de banco do fluxo atual
+#Se já houver uma etapa aberta (ex.: verificação de existência), o tempo fica com ela
+class PoolSessao:
+    def __init__(self, pool):
+        self.pool = pool
+        self.max = pool.max
+
+    def acquire(self):
+        sessao = getattr(local, "sessao", None)
+        medir = sessao is not None and len(sessao.pilha) == 0
+        if medir:
+            sessao.Entra(sessao.fluxo or "banco")
+
+        try:
+            return ConexaoSessao(self.pool.acquire(), sessao if medir else None)
+        except Exception:
+            if medir:
+                sessao.Sai()
+            raise
+
+    def close(self):
+        self.pool.close()
+
+class ConexaoSessao:
+    def __init__(self, conn, sessao):
+        self.conn = conn
+        self.sessao = sessao
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        try:
+            return self.conn.__exit__(*args)
+        finally:
+            if self.sessao is not None:
+                self.sessao.Sai()
+
+    #cursor, commit, rollback, ... vão direto para a conexão
+    def __getattr__(self, nome):
+        return getattr(self.conn, nome)
+
+#Troca as funções dos módulos pelas versões medidas enquanto o bloco roda, e restaura depois
+@contextmanager
+def Instrumenta():
+    trocas = []
+
+    def Troca(modulo, nome, valor):
+        #Guarda o original; print/input não existem no módulo (vêm de builtins), então são apagados na volta
+        trocas.append((modulo, nome, modulo.__dict__.get(nome)))
+        setattr(modulo, nome, valor)
+
+    for etapa, funcoes in ETAPAS:
+        for nome in funcoes:
+            Troca(Aplicacao, nome, Medida(etapa, getattr(Aplicacao, nome)))
+
+    for nome, fluxo in FLUXOS.items():
+        Troca(Aplicacao, nome, Fluxo(fluxo, getattr(Aplicacao, nome)))
+
+    Troca(Aplicacao, "input", Entrada)
+    for modulo in MODULOS_EXIBICAO:
+        Troca(modulo, "print", Medida("exibicao", Imprime))
+        Troca(modulo, "tabulate", Medida("exibicao", modulo.tabulate))
+
+    try:
+        yield
+    finally:
+        for modulo, nome, original in reversed(trocas):
+            if original is None:
+                delattr(modulo, nome)
+            else:
+                setattr(modulo, nome, original)
+
+#Reproduz um roteiro pelo menu principal, na thread atual
+#perfil -> cProfile.Profile usado só durante esta sessão
+def ReproduzSessao(pool, roteiro, pausa=0.0, perfil=None):
+    sessao = Sessao(roteiro["nome"], roteiro["entradas"], pausa)
+    local.sessao = sessao
+
+    inicio = time.perf_counter()
+    try:
+        if perfil is not None:
+            perfil.enable()
+
+        Aplicacao.Menu(pool)
+
+        if sessao.posicao < len(sessao.entradas):
+            sessao.erro = f"sobraram {len(sessao.entradas) - sessao.posicao} entradas no roteiro"
+
+        #Os fluxos do menu tratam os próprios erros e só os imprimem, então a saída também é conferida
+        erro = re.search(r"^\s*(Erro.*)$", sessao.saida.getvalue(), re.MULTILINE)
+        if sessao.erro is None and erro is not None:
+            sessao.erro = erro.group(1).strip()
+    except Exception as e:
+        sessao.erro = f"{type(e).__name__}: {e}"
+    finally:
+        if perfil is not None:
+            perfil.disable()
+        local.sessao = None
+
+    #Tempo ativo da sessão, sem a digitação; o que não foi para nenhuma etapa é o controle dos próprios fluxos
+    ativo = time.perf_counter() - inicio - sessao.pausa * sessao.posicao
+    sessao.amostras["sessao"].append(ativo)
+    sessao.amostras["controle"].append(ativo - sum(sum(sessao.amostras[etapa]) for etapa in ORDEM_ETAPAS[:-2]))
+
+    return sessao
+
+#======================================= ROTEIROS ======================================
+
+#Opção do menu principal que fecha o programa (última entrada de todo roteiro)
+SAIR = "7"
+
+#Criação das tabelas e inserção dos dados iniciais pelo menu, numa base vazia
+ROTEIRO_CARGA = {"nome": "carga", "entradas": ["4", "S", "S", SAIR]}
+
+NOMES = ["ANA", "BRUNO", "CARLA", "DIEGO", "ELISA", "FABIO", "GABRIELA", "HUGO", "ISABEL", "JOAO", "LARISSA", "MARCOS"]
+SOBRENOMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "PEREIRA", "COSTA", "RODRIGUES", "ALMEIDA", "LIMA", "GOMES"]
+CIDADES = {
+    "SP": ["SAO PAULO", "CAMPINAS", "SAO CARLOS"],
+    "RJ": ["RIO DE JANEIRO", "NITEROI"],
+    "MG": ["BELO HORIZONTE", "UBERLANDIA"],
+    "RS": ["PORTO ALEGRE"],
+}
+BAIRROS = ["CENTRO", "JARDIM AMERICA", "VILA NOVA", "BELA VISTA"]
+RUAS = ["RUA DAS FLORES", "AVENIDA BRASIL", "RUA XV DE NOVEMBRO", "RUA SETE"]
+CORES = ["BRANCO", "PRETO", "PARDO", "AMARELO", "INDIGENA"]
+
+#CPF válido (com os dígitos verificadores) a partir dos 9 primeiros dígitos
+def GeraCPF(numero):
+    digitos = [int(c) for c in f"{numero:09d}"]
+    for peso in (10, 11):
+        soma = sum(d * (peso - i) for i, d in enumerate(digitos))
+        digito = 11 - soma % 11
+        digitos.append(0 if digito >= 10 else digito)
+
+    numeros = "".join(str(d) for d in digitos)
+    return f"{numeros[:3]}.{numeros[3:6]}.{numeros[6:9]}-{numeros[9:]}"
+
+def GeraTelefone(gerador):
+    return f"({gerador.randint(11, 99)})9{gerador.randint(0, 9999):04d}-{gerador.randint(0, 9999):04d}"
+
+#Cadastro de um paciente novo; erros -> digita antes alguns valores inválidos, como um atendente faria
+def RoteiroCadastro(gerador, cpf, erros):
+    entradas = ["0"]
+
+    #Pessoa
+    if erros:
+        entradas.append(cpf.replace(".", "").replace("-", ""))
+    entradas += [cpf, f"{gerador.choice(NOMES)} {gerador.choice(SOBRENOMES)} {gerador.choice(SOBRENOMES)}"]
+
+    if gerador.random() < 0.7:
+        estado = gerador.choice(list(CIDADES))
+        if erros:
+            entradas.append("XX")
+        entradas += [estado, gerador.choice(CIDADES[estado]), gerador.choice(BAIRROS), gerador.choice(RUAS)]
+        if erros:
+            entradas.append("-10")
+        entradas.append(str(gerador.randint(1, 9999)))
+    else:
+        #Sem estado o endereço fica incompleto, e é confirmado que é para pulá-lo
+        entradas += ["", "S"]
+
+    if gerador.random() < 0.8:
+        if erros:
+            entradas.append("1234-5678")
+        entradas.append(GeraTelefone(gerador))
+        entradas += [GeraTelefone(gerador)] if gerador.random() < 0.3 else ["", "S"]
+    else:
+        entradas += ["", "S"]
+
+    entradas.append("S")
+
+    #Paciente
+    if erros:
+        entradas.append("X")
+    entradas.append(gerador.choice("MF"))
+    if erros:
+        entradas.append("31/12/1990")
+    entradas += [f"{gerador.randint(1930, 2020)}-{gerador.randint(1, 12):02d}-{gerador.randint(1, 28):02d}", "", "S"]
+    if erros:
+        entradas.append("AZUL")
+    entradas.append(gerador.choice(CORES))
+    if erros:
+        entradas.append("abc")
+    entradas.append(f"{gerador.uniform(3, 150):.1f}".replace(".", ","))
+    entradas += [GeraTelefone(gerador), "", "S"] if gerador.random() < 0.5 else ["", "S"]
+    entradas.append("S")
+
+    return entradas + [SAIR]
+
+#Busca de pessoas por parte do nome e, às vezes, pelo estado
+def RoteiroBusca(gerador):
+    estado = gerador.choice(list(CIDADES)) if gerador.random() < 0.3 else ""
+    return ["1", "", "", gerador.choice(NOMES + SOBRENOMES), estado, "", "", "", "", "", "", SAIR]
+
+#Gera roteiros variados a partir do que já existe na base (CPFs de pessoas e pacientes, IDs de pacientes)
+#Os CPFs novos são únicos, então as sessões podem rodar em qualquer ordem e ao mesmo tempo
+def GeraRoteiros(pool, quantidade, semente=0):
+    gerador = random.Random(semente)
+
+    with pool.acquire() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT P.CPF, P.ID, PA.PESSOA FROM PESSOA P LEFT JOIN PACIENTE PA ON PA.PESSOA = P.ID")
+            linhas = [linha for linha in cursor.fetchall() if Aplicacao.VerificaCPF(linha[0])]
+
+    pessoas = [cpf for cpf, _, paciente in linhas if paciente is None]
+    pacientes = [cpf for cpf, _, paciente in linhas if paciente is not None]
+    idsPacientes = [BaseLocal.BinParaHex(idPessoa) for _, idPessoa, paciente in linhas if paciente is not None]
+
+    roteiros = []
+    for i in range(quantidade):
+        sorteio = gerador.random()
+        if sorteio < 0.6 or len(pacientes) == 0:
+            erros = gerador.random() < 0.2
+            roteiro = {"nome": "cadastro com erros" if erros else "cadastro",
+                       "entradas": RoteiroCadastro(gerador, GeraCPF(500000000 + i), erros)}
+        elif sorteio < 0.8:
+            roteiro = {"nome": "busca", "entradas": RoteiroBusca(gerador)}
+        elif sorteio < 0.9:
+            ids = gerador.sample(idsPacientes, min(3, len(idsPacientes)))
+            roteiro = {"nome": "dossie", "entradas": ["2", ", ".join(ids), SAIR]}
+        elif sorteio < 0.95 and len(pessoas) > 0:
+            #Pessoa que não é paciente (funcionário): desiste de cadastrá-la como paciente
+            roteiro = {"nome": "pessoa existente", "entradas": ["0", gerador.choice(pessoas), "N", SAIR]}
+        else:
+            roteiro = {"nome": "paciente existente", "entradas": ["0", gerador.choice(pacientes), SAIR]}
+
+        roteiros.append(roteiro)
+
+    return roteiros
+
+#Carrega a base vazia pela opção de carga do menu, com o pool envolvido como nas sessões reproduzidas
+#Assim toda reprodução também confere o fluxo de carga
+def CarregaPeloMenu(pool):
+    with Instrumenta():
+        sessao = ReproduzSessao(PoolSessao(BaseLocal.PoolMedido(pool)), ROTEIRO_CARGA)
+
+    if sessao.erro is not None:
+        raise RuntimeError(f"Falha na carga da base pelo menu: {sessao.erro}")
+
+#Roteiros ficam num arquivo JSON Lines: {"nome": ..., "entradas": [...]} por linha
+def LeRoteiros(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip() != ""]
+
+def SalvaRoteiros(caminho, roteiros, modo="w"):
+    with open(caminho, modo, encoding="utf-8") as arquivo:
+        for roteiro in roteiros:
+            arquivo.write(json.dumps(roteiro, ensure_ascii=False) + "\n")
+
+#Usa a aplicação normalmente, guardando tudo o que foi digitado como um roteiro no fim do arquivo
+def GravaSessao(pool, caminho, nome):
+    entradas = []
+
+    def Grava(mensagem=""):
+        entrada = builtins.input(mensagem)
+        entradas.append(entrada)
+        return entrada
+
+    Aplicacao.input = Grava
+    try:
+        Aplicacao.Menu(pool)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del Aplicacao.input
+
+    SalvaRoteiros(caminho, [{"nome": nome, "entradas": entradas}], "a")
+    print(f"\nRoteiro '{nome}' com {len(entradas)} entradas salvo em {caminho}")
+
+#======================================= REPRODUÇÃO ======================================
+
+#Percentil p (0 a 1) de uma lista ordenada
+def Percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+#Reproduz os roteiros (repetidos até 'sessoes', se forem menos) com 'concorrencia' sessões ao mesmo tempo
+#latencia -> atraso simulado por ida ao banco; pausa -> tempo de digitação por entrada
+#perfil -> junta um cProfile de todas as sessões; memoria -> acompanha as alocações com tracemalloc
+#Retorna as sessões reproduzidas e o perfil (pstats.Stats ou None)
+def Reproduz(pool, roteiros, sessoes=None, concorrencia=8, latencia=0.0, pausa=0.0, perfil=False, memoria=False):
+    sessoes = sessoes or len(roteiros)
+    if sessoes > len(roteiros):
+        #Na repetição, o CPF de um cadastro já existe e a sessão segue outro caminho (o resto do roteiro vira comandos inválidos)
+        print(f"[AVISO] {len(roteiros)} roteiros para {sessoes} sessões, os roteiros serão repetidos")
+    roteiros = [roteiros[i % len(roteiros)] for i in range(sessoes)]
+
+    #Até o 3.11 cada thread tem o seu perfilador; a partir do 3.12 só pode haver um ativo por vez
+    if perfil and sys.version_info >= (3, 12) and concorrencia > 1:
+        print("[AVISO] cProfile só aceita um perfilador ativo por vez nesta versão do Python, as sessões vão rodar uma a uma")
+        concorrencia = 1
+
+    medido = BaseLocal.PoolMedido(pool, latencia)
+    poolSessoes = PoolSessao(medido)
+    perfis = []
+
+    def Roda(roteiro):
+        perfilSessao = cProfile.Profile() if perfil else None
+        if perfilSessao is not None:
+            perfis.append(perfilSessao)
+
+        return ReproduzSessao(poolSessoes, roteiro, pausa, perfilSessao)
+
+    if memoria:
+        tracemalloc.start(10)
+
+    inicio = time.perf_counter()
+    with Instrumenta():
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            resultado = list(executor.map(Roda, roteiros))
+    duracao = time.perf_counter() - inicio
+
+    ImprimeRelatorio(resultado, duracao, concorrencia, medido.idas)
+
+    if memoria:
+        ImprimeMemoria(tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    estatisticas = None
+    if perfil:
+        estatisticas = pstats.Stats(perfis[0])
+        for perfilSessao in perfis[1:]:
+            estatisticas.add(perfilSessao)
+
+    return resultado, estatisticas
+
+#======================================= RELATÓRIO ======================================
+
+def ImprimeRelatorio(sessoes, duracao, concorrencia, idas):
+    falhas = [sessao for sessao in sessoes if sessao.erro is not None]
+
+    print(f"\n==== Reprodução de sessões ({len(sessoes)} sessões, {concorrencia} ao mesmo tempo) ====")
+    porTipo = defaultdict(int)
+    for sessao in sessoes:
+        porTipo[sessao.nome] += 1
+    print(tabulate([[nome, quantidade] for nome, quantidade in sorted(porTipo.items())],
+                   headers=["Roteiro", "Sessões"], tablefmt="psql"))
+
+    print(f"Tempo total: {duracao:.2f}s | Sessões por segundo: {len(sessoes) / duracao:.1f} | "
+          f"Idas ao banco: {idas} | Sessões com falha: {len(falhas)}")
+
+    #Latência por chamada de cada etapa, juntando todas as sessões
+    amostras = defaultdict(list)
+    for sessao in sessoes:
+        for etapa, duracoes in sessao.amostras.items():
+            amostras[etapa].extend(duracoes)
+
+    relatorio = []
+    for etapa in ORDEM_ETAPAS:
+        if len(amostras[etapa]) == 0:
+            continue
+
+        ordenados = sorted(amostras[etapa])
+        relatorio.append([etapa, len(ordenados), f"{sum(ordenados) * 1000:.1f}",
+                          f"{sum(ordenados) / len(ordenados) * 1000:.3f}",
+                          f"{Percentil(ordenados, 0.5) * 1000:.3f}", f"{Percentil(ordenados, 0.95) * 1000:.3f}",
+                          f"{Percentil(ordenados, 0.99) * 1000:.3f}", f"{ordenados[-1] * 1000:.3f}"])
+
+    print("\n---- Latência por etapa (ms) ----")
+    print("controle -> laços e conversões dentro dos próprios fluxos; sessao -> sessão inteira, sem a digitação")
+    print(tabulate(relatorio, headers=["Etapa", "Chamadas", "Total", "Média", "p50", "p95", "p99", "Máx"], tablefmt="psql"))
+
+    if len(falhas) > 0:
+        print("\n---- Sessões com falha (até 5) ----")
+        for sessao in falhas[:5]:
+            final = sessao.saida.getvalue().strip().splitlines()[-3:]
+            print(f"{sessao.nome}: {sessao.erro}")
+            for linha in final:
+                print(f"    {linha}")
+
+def ImprimeMemoria(snapshot, pico, quantidade=10):
+    #Ignora as alocações do próprio tracemalloc e deste módulo (saídas e amostras guardadas das sessões)
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+
+    print(f"\n---- Memória (tracemalloc): pico de {pico / 1024:.1f} KiB ----")
+    relatorio = [[str(estatistica.traceback[0]), f"{estatistica.size / 1024:.1f}", estatistica.count]
+                 for estatistica in snapshot.statistics("lineno")[:quantidade]]
+    print(tabulate(relatorio, headers=["Linha", "KiB ainda alocados", "Blocos"], tablefmt="psql"))
+
+#======================================= MAIN ======================================
+
+#Uso (dentro da pasta 'Aplicacao'):
+#python Sessoes.py reproduzir [--sessoes N] [--concorrencia C] [--roteiros arquivo.jsonl] [--perfil [arquivo.prof]] [--memoria]
+#python Sessoes.py gerar arquivo.jsonl [--sessoes N]
+#python Sessoes.py gravar arquivo.jsonl nome_do_roteiro
+#Tudo roda numa base local temporária, carregada com SQL/esquema.sql e SQL/dados.sql
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reprodução de sessões roteirizadas da aplicação numa base local")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    reproduzir = comandos.add_parser("reproduzir", help="reproduz roteiros gerados ou de um arquivo")
+    reproduzir.add_argument("--roteiros", help="arquivo JSON Lines com os roteiros (sem ele, são gerados)")
+    reproduzir.add_argument("--sessoes", type=int, default=200)
+    reproduzir.add_argument("--concorrencia", type=int, default=8)
+    reproduzir.add_argument("--latencia", type=float, default=0.0, help="atraso simulado por ida ao banco (s)")
+    reproduzir.add_argument("--pausa", type=float, default=0.0, help="tempo de digitação por entrada (s)")
+    reproduzir.add_argument("--perfil", nargs="?", const="", help="cProfile das sessões (opcionalmente salvo num arquivo)")
+    reproduzir.add_argument("--memoria", action="store_true", help="alocações com tracemalloc")
+    reproduzir.add_argument("--semente", type=int, default=0)
+
+    gerar = comandos.add_parser("gerar", help="gera roteiros num arquivo, para editar ou reproduzir depois")
+    gerar.add_argument("arquivo")
+    gerar.add_argument("--sessoes", type=int, default=200)
+    gerar.add_argument("--semente", type=int, default=0)
+
+    gravar = comandos.add_parser("gravar", help="usa a aplicação e grava o que foi digitado como um roteiro")
+    gravar.add_argument("arquivo")
+    gravar.add_argument("nome")
+
+    argumentos = parser.parse_args()
+
+    pool = BaseLocal.PoolLocal()
+    try:
+        print("Carregando a base local pelo menu...")
+        CarregaPeloMenu(pool)
+
+        match argumentos.comando:
+            case "reproduzir":
+                if argumentos.roteiros:
+                    roteiros = LeRoteiros(argumentos.roteiros)
+                else:
+                    roteiros = GeraRoteiros(pool, argumentos.sessoes, argumentos.semente)
+
+                _, estatisticas = Reproduz(pool, roteiros, argumentos.sessoes, argumentos.concorrencia, argumentos.latencia,
+                                           argumentos.pausa, argumentos.perfil is not None, argumentos.memoria)
+
+                if estatisticas is not None:
+                    print("\n---- Perfil (cProfile), 25 funções com maior tempo acumulado ----")
+                    estatisticas.sort_stats("cumulative").print_stats(25)
+                    if argumentos.perfil:
+                        estatisticas.dump_stats(argumentos.perfil)
+                        print(f"Perfil completo salvo em {argumentos.perfil}")
+            case "gerar":
+                SalvaRoteiros(argumentos.arquivo, GeraRoteiros(pool, argumentos.sessoes, argumentos.semente))
+                print(f"{argumentos.sessoes} roteiros salvos em {argumentos.arquivo}")
+            case "gravar":
+                GravaSessao(pool, argumentos.arquivo, argumentos.nome)
+    finally:
+        pool.close()
@@ -75,7 +75,9 @@ CREATE TABLE PESSOA(
     --Optou-se por fazer assim pois o uso de números fixos atualmente é consideravelmente raro
     CONSTRAINT CK_PESSOA_TELEFONE1 CHECK(TELEFONE1 IS NULL OR REGEXP_LIKE(TELEFONE1, '\([0-9]{2}\)9[0-9]{4}\-[0-9]{4}')),
     CONSTRAINT CK_PESSOA_TELEFONE2 CHECK(TELEFONE2 IS NULL OR REGEXP_LIKE(TELEFONE2, '\([0-9]{2}\)9[0-9]{4}\-[0-9]{4}'))
-);
+
+--ROWDEPENDENCIES -> ORA_ROWSCN por linha (e não por bloco), usado para sincronizar a réplica local só com o que mudou
+) ROWDEPENDENCIES;
 
 CREATE TABLE FUNCIONARIO(
     PESSOA RAW(8) NOT NULL,
@@ -140,7 +142,9 @@ CREATE TABLE PACIENTE(
     --Optou-se por fazer assim pois o uso de números fixos atualmente é consideravelmente raro
     CONSTRAINT CK_PACIENTE_TELEFONE_EMERGENCIA1 CHECK(TELEFONE_EMERGENCIA1 IS NULL OR REGEXP_LIKE(TELEFONE_EMERGENCIA1, '\([0-9]{2}\)9[0-9]{4}\-[0-9]{4}')),
     CONSTRAINT CK_PACIENTE_TELEFONE_EMERGENCIA2 CHECK(TELEFONE_EMERGENCIA2 IS NULL OR REGEXP_LIKE(TELEFONE_EMERGENCIA2, '\([0-9]{2}\)9[0-9]{4}\-[0-9]{4}'))
-);
+
+--Mesma razão de PESSOA: sincronização incremental da réplica local
+) ROWDEPENDENCIES;
 
 CREATE TABLE ESPECIALIZACAO_PACIENTE(
     PACIENTE RAW(8) NOT NULL,